@@ -0,0 +1,58 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from phonemic import (
+    PHONEME_TABLE_PATH,
+    PhonemeTable,
+    convert_syllable,
+    load_syllables,
+    write_phoneme_table,
+)
+
+PROJECT_2 = Path(__file__).parent.parent / "Project_2"
+sys.path.insert(0, str(PROJECT_2))
+
+from syllables import iter_possible_syllables  # noqa: E402
+
+
+def collect_syllables(csv_path, combinatorial=False):
+    """Âm tiết có trong từ điển, thêm toàn bộ không gian tổ hợp nếu cần"""
+    syllables = set(load_syllables(csv_path))
+    if combinatorial:
+        syllables.update(iter_possible_syllables())
+    return syllables
+
+
+def build_phoneme_table(out_path, csv_path, combinatorial=False):
+    syllables = collect_syllables(csv_path, combinatorial)
+    entries = {syl: convert_syllable(syl) for syl in syllables}
+    return write_phoneme_table(out_path, entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build bảng tra âm tiết -> phiên âm")
+    parser.add_argument("-o", "--output", default=PHONEME_TABLE_PATH)
+    parser.add_argument(
+        "--syllables", default=PROJECT_2 / "unique_syllables.csv", help="CSV âm tiết"
+    )
+    parser.add_argument(
+        "--combinatorial",
+        action="store_true",
+        help="Thêm toàn bộ tổ hợp onset×medial×nucleus×coda×tone hợp lệ",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_phoneme_table(args.output, args.syllables, args.combinatorial)
+    elapsed = time.perf_counter() - start
+    size = Path(args.output).stat().st_size
+    print(f"Đã ghi {count} âm tiết vào {args.output} ({size} bytes, {elapsed:.2f}s)")
+
+    table = PhonemeTable(args.output)
+    bad = [k for k, v in table.items() if convert_syllable(k) != v]
+    table.close()
+    if bad:
+        print(f"Lỗi: {len(bad)} mục không khớp bộ luật, vd. {bad[:5]}")
+        sys.exit(1)
@@ -0,0 +1,515 @@
+import re
+import unicodedata
+import sys
+import csv
+import hashlib
+import mmap
+import struct
+import zlib
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+
+TONE_MARKS = {
+    "\u0301": 5,  # sắc
+    "\u0300": 2,  # huyền
+    "\u0303": 3,  # ngã
+    "\u0309": 4,  # hỏi
+    "\u0323": 6,  # nặng
+}
+TONE_DEFAULT = 1  # ngang
+
+
+def strip_tone_and_get_number(word: str):
+    d = unicodedata.normalize("NFD", word)
+    tone = None
+    out = []
+    for ch in d:
+        if unicodedata.combining(ch):
+            if ch in TONE_MARKS and tone is None:
+                tone = TONE_MARKS[ch]
+            else:
+                out.append(ch)
+        else:
+            out.append(ch)
+    if tone is None:
+        tone = TONE_DEFAULT
+    return unicodedata.normalize("NFC", "".join(out)), tone
+
+
+PL_IE  = "\ue000"  # iê/ia/yê -> ie
+PL_UO  = "\ue001"  # uô/ua -> uo
+PL_UG  = "\ue002"  # ươ/ưa -> ɯɤ
+PL_ECI = "\ue003"  # ây -> ɤ̌i
+
+SEQ_RULES = [
+    (r"ngh", "ŋ"),
+    (r"ng",  "ŋ"),
+    (r"gh",  "ɣ"),
+    (r"kh",  "χ"),
+    (r"ph",  "f"),
+    (r"th",  "tʰ"),
+    (r"tr",  "ʈ"),
+    (r"ch",  "C"),
+    (r"gi",  "z"),
+    (r"qu",  "kw"),
+]
+
+DIPH_RULES = [
+    (r"iê", PL_IE), (r"yê", PL_IE), (r"ia", PL_IE),
+    (r"uô", PL_UO), (r"ua", PL_UO),
+    (r"ươ", PL_UG), (r"ưa", PL_UG),
+    (r"ây", PL_ECI),
+]
+
+VOW_PRE_RULES = [
+    (r"ê", "E"),
+    (r"ô", "O"),
+    (r"ơ", "ɤ"),
+    (r"ư", "ɯ"),
+    (r"â", "ɤ̆"),
+    (r"ă", "ă"),
+]
+
+CONS_SINGLE_RULES = [
+    (r"b", "b"),
+    (r"c", "k"),
+    (r"k", "k"),
+    (r"q", "k"),
+    (r"đ", "D"),
+    (r"g", "ɣ"),
+    (r"h", "h"),
+    (r"l", "l"),
+    (r"m", "m"),
+    (r"n", "n"),
+    (r"p", "p"),
+    (r"r", "ʐ"),
+    (r"s", "ʂ"),
+    (r"t", "t"),
+    (r"v", "v"),
+    (r"x", "s"),
+    (r"d", "z"),
+]
+
+VOW_FINAL_RULES = [
+    (r"y", "i"),
+    (r"i", "i"),
+    (r"e", "ɛ"),
+    (r"o", "ɔ"),
+    (r"a", "a"),
+    (r"u", "u"),
+]
+
+# Thứ tự áp dụng các bảng luật trong pipeline gốc
+RULE_PASSES = [DIPH_RULES, SEQ_RULES, VOW_PRE_RULES, CONS_SINGLE_RULES, VOW_FINAL_RULES]
+
+# Các phép thay thế cuối cùng (ký hiệu tạm -> ký hiệu âm vị)
+FINAL_REPLACEMENTS = [
+    ("C", "c"), ("D", "d"), ("E", "e"), ("O", "o"),
+    (PL_IE, "ie"), (PL_UO, "uo"), (PL_UG, "ɯɤ"), (PL_ECI, "ɤ̌i"),
+]
+
+
+def apply_rules(s: str, rules):
+    for pat, rep in rules:
+        s = re.sub(pat, rep, s)
+    return s
+
+
+def apply_all_rules(s: str) -> str:
+    """Pipeline gốc: áp dụng lần lượt từng bảng luật bằng re.sub"""
+    for rules in RULE_PASSES:
+        s = apply_rules(s, rules)
+    for src, dst in FINAL_REPLACEMENTS:
+        s = s.replace(src, dst)
+    return s
+
+
+def convert_word_with_tone(token: str) -> str:
+    if not re.search(r"\w", token, flags=re.UNICODE):
+        return token
+
+    base, tone = strip_tone_and_get_number(token)
+    s = apply_all_rules(base.lower())
+    return f"{s}{tone}"
+
+
+# ----------------------------------------------------------------------------
+# Bộ biên dịch luật: trie longest-match, duyệt một lượt trái -> phải
+# ----------------------------------------------------------------------------
+
+_TERMINAL = ""  # khóa đánh dấu nút kết thúc trong trie
+
+
+def _overlap_keys(keys, patterns, max_len):
+    """Đóng bao các chuỗi tạo thành khi hai pattern chồng lấn lên nhau"""
+    keys = set(keys)
+    frontier = set(keys)
+    while frontier:
+        found = set()
+        for k in frontier:
+            for p in patterns:
+                for n in range(1, min(len(k), len(p))):
+                    # k ... p (đuôi của k là đầu của p) và p ... k
+                    for combined in (
+                        k + p[n:] if k.endswith(p[:n]) else None,
+                        p + k[n:] if p.endswith(k[:n]) else None,
+                    ):
+                        if combined and len(combined) <= max_len and combined not in keys:
+                            found.add(combined)
+        keys |= found
+        frontier = found
+    return keys
+
+
+def compile_rules(rule_passes=None, reference=None):
+    """Biên dịch các bảng luật thành (trie, bảng ký tự) cho một lượt quét.
+
+    Luật nhiều ký tự (DIPH, SEQ) được gom vào một trie; mỗi khóa, kể cả các
+    chuỗi chồng lấn giữa hai luật (vd. "gia", "qua"), lưu sẵn kết quả của
+    pipeline gốc nên thứ tự ưu tiên giữa các bảng luật được giữ nguyên.
+    Luật một ký tự đứng sau được gộp thành bảng ánh xạ từng ký tự.
+    """
+    rule_passes = RULE_PASSES if rule_passes is None else rule_passes
+    reference = apply_all_rules if reference is None else reference
+
+    multi, single = [], []
+    for rules in rule_passes:
+        lengths = {len(pat) for pat, _ in rules}
+        if lengths == {1}:
+            single.extend(pat for pat, _ in rules)
+        elif single:
+            raise ValueError("Luật nhiều ký tự phải đứng trước các luật một ký tự")
+        else:
+            multi.extend(pat for pat, _ in rules)
+
+    max_len = 3 * max((len(p) for p in multi), default=1)
+    trie = {}
+    for key in _overlap_keys(multi, multi, max_len):
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[_TERMINAL] = reference(key)
+
+    touched = set("".join(multi)) | set(single)
+    touched |= {src for src, _ in FINAL_REPLACEMENTS}
+    char_map = {ch: reference(ch) for ch in touched}
+    return trie, char_map
+
+
+_TRIE, _CHAR_MAP = compile_rules()
+
+
+def transduce(s: str, trie=_TRIE, char_map=_CHAR_MAP) -> str:
+    """Chuyển chuỗi (đã bỏ thanh, viết thường) trong một lượt quét"""
+    out = []
+    i, n = 0, len(s)
+    while i < n:
+        node = trie.get(s[i])
+        match, end = None, i
+        j = i
+        while node is not None:
+            j += 1
+            if _TERMINAL in node:
+                match, end = node[_TERMINAL], j
+            node = node.get(s[j]) if j < n else None
+        if match is not None:
+            out.append(match)
+            i = end
+        else:
+            ch = s[i]
+            out.append(char_map.get(ch, ch))
+            i += 1
+    return "".join(out)
+
+
+_WORD_RE = re.compile(r"\w", flags=re.UNICODE)
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+
+def convert_syllable(token: str) -> str:
+    """Tương đương convert_word_with_tone nhưng dùng trie đã biên dịch"""
+    if not _WORD_RE.search(token):
+        return token
+    base, tone = strip_tone_and_get_number(token)
+    return f"{transduce(base.lower())}{tone}"
+
+
+def load_syllables(csv_path):
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        return [row[0] for row in csv.reader(f) if row and row[0]]
+
+
+class SyllableCache:
+    """Cache LRU có giới hạn cho kết quả chuyển âm tiết, khóa là token đã NFC.
+
+    Mỗi mục lưu (phiên âm, phần gốc không thanh, số thanh) nên cả
+    convert_syllable lẫn strip_tone_and_get_number đều dùng chung một lần tính.
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        if maxsize <= 0:
+            raise ValueError("maxsize phải lớn hơn 0")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _entry(self, token: str, table=None):
+        key = unicodedata.normalize("NFC", token)
+        data = self._data
+        entry = data.get(key)
+        if entry is not None:
+            self.hits += 1
+            data.move_to_end(key)
+            return entry
+        self.misses += 1
+        base, tone = strip_tone_and_get_number(key)
+        phonemic = None if table is None else table.get(key)
+        if phonemic is None:
+            phonemic = f"{transduce(base.lower())}{tone}"
+        entry = (phonemic, base, tone)
+        data[key] = entry
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def convert(self, token: str, table=None) -> str:
+        """Tra cache trước; khi trượt mới tra `table` (PhonemeTable) rồi mới chạy bộ luật"""
+        if not _WORD_RE.search(token):
+            return token
+        return self._entry(token, table)[0]
+
+    def strip_tone(self, token: str):
+        _, base, tone = self._entry(token)
+        return base, tone
+
+    def warm(self, syllables) -> int:
+        """Nạp trước các âm tiết (vd. unique_syllables.csv), không tính vào thống kê"""
+        hits, misses = self.hits, self.misses
+        for syl in syllables:
+            if _WORD_RE.search(syl):
+                self._entry(syl)
+        self.hits, self.misses = hits, misses
+        return len(self._data)
+
+    def resize(self, maxsize: int):
+        if maxsize <= 0:
+            raise ValueError("maxsize phải lớn hơn 0")
+        self.maxsize = maxsize
+        while len(self._data) > maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+SYLLABLE_CACHE = SyllableCache()
+
+
+def rules_fingerprint() -> bytes:
+    """Hash SHA-256 của các bảng luật, dùng để phát hiện bảng tra đã cũ"""
+    tables = (RULE_PASSES, FINAL_REPLACEMENTS, sorted(TONE_MARKS.items()), TONE_DEFAULT)
+    return hashlib.sha256(repr(tables).encode("utf-8")).digest()
+
+
+# ----------------------------------------------------------------------------
+# Bảng tra dựng sẵn: header | offsets | slots băm | chuỗi UTF-8 (uint32 little-endian)
+# Offset thứ 2k, 2k+1 là đầu khóa/giá trị thứ k; khóa được sắp xếp theo byte.
+# Slots là bảng băm địa chỉ mở (crc32, dò tuyến tính) chứa k + 1, 0 là ô trống.
+# ----------------------------------------------------------------------------
+
+TABLE_MAGIC = b"VNPHON01"
+TABLE_HEADER = struct.Struct("<8s32sII")  # magic, fingerprint, số mục, số slot
+PHONEME_TABLE_PATH = Path(__file__).with_name("phonemes.bin")
+
+
+class PhonemeTable:
+    """Bảng tra âm tiết -> phiên âm đọc trực tiếp qua mmap, tra O(1) qua slot băm"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.fingerprint, self._count, nslots = TABLE_HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != TABLE_MAGIC:
+            self._mm.close()
+            raise ValueError(f"Không phải bảng tra phiên âm: {self.path}")
+        self._mask = nslots - 1
+        start = TABLE_HEADER.size
+        slots_start = start + 4 * (2 * self._count + 1)
+        self._blob = slots_start + 4 * nslots
+        self._offsets = self._uint32(start, slots_start)
+        self._slots = self._uint32(slots_start, self._blob)
+
+    def _uint32(self, start: int, end: int):
+        if sys.byteorder == "little":
+            return memoryview(self._mm)[start:end].cast("I")
+        values = array("I", self._mm[start:end])
+        values.byteswap()
+        return values
+
+    def __len__(self):
+        return self._count
+
+    def _slice(self, k: int) -> bytes:
+        return self._mm[self._blob + self._offsets[k] : self._blob + self._offsets[k + 1]]
+
+    def _find(self, key: bytes) -> int:
+        slots, mask = self._slots, self._mask
+        h = zlib.crc32(key) & mask
+        while True:
+            k = slots[h] - 1
+            if k < 0:
+                return -1
+            if self._slice(2 * k) == key:
+                return k
+            h = (h + 1) & mask
+
+    def get(self, token: str, default=None):
+        k = self._find(unicodedata.normalize("NFC", token).encode("utf-8"))
+        return default if k < 0 else self._slice(2 * k + 1).decode("utf-8")
+
+    def __contains__(self, token: str):
+        return self.get(token) is not None
+
+    def items(self):
+        for k in range(self._count):
+            yield self._slice(2 * k).decode("utf-8"), self._slice(2 * k + 1).decode("utf-8")
+
+    def close(self):
+        for view in (self._offsets, self._slots):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mm.close()
+
+
+def write_phoneme_table(path, entries: dict[str, str]) -> int:
+    """Ghi bảng tra (khóa NFC) ra file, trả về số mục"""
+    pairs = sorted(
+        (unicodedata.normalize("NFC", k).encode("utf-8"), v.encode("utf-8"))
+        for k, v in entries.items()
+    )
+    offsets = array("I", [0])
+    blob = bytearray()
+    for key, value in pairs:
+        blob += key
+        offsets.append(len(blob))
+        blob += value
+        offsets.append(len(blob))
+
+    # Hệ số tải <= 0.5 để chuỗi dò ngắn
+    nslots = 1
+    while nslots < 2 * len(pairs):
+        nslots *= 2
+    slots = array("I", bytes(4 * nslots))
+    for k, (key, _) in enumerate(pairs):
+        h = zlib.crc32(key) & (nslots - 1)
+        while slots[h]:
+            h = (h + 1) & (nslots - 1)
+        slots[h] = k + 1
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        slots.byteswap()
+    with open(path, "wb") as f:
+        f.write(TABLE_HEADER.pack(TABLE_MAGIC, rules_fingerprint(), len(pairs), nslots))
+        f.write(offsets.tobytes())
+        f.write(slots.tobytes())
+        f.write(blob)
+    return len(pairs)
+
+
+def open_phoneme_table(path=PHONEME_TABLE_PATH):
+    """Mmap bảng tra nếu file tồn tại và được build từ đúng bộ luật hiện tại"""
+    if not Path(path).exists():
+        return None
+    table = PhonemeTable(path)
+    if table.fingerprint != rules_fingerprint():
+        print(f"Bỏ qua {path}: bảng tra được build từ bộ luật khác", file=sys.stderr)
+        table.close()
+        return None
+    return table
+
+
+PHONEME_TABLE = open_phoneme_table()
+
+
+def use_phoneme_table(path):
+    """Đổi bảng tra mặc định (None để tắt)"""
+    global PHONEME_TABLE
+    PHONEME_TABLE = open_phoneme_table(path) if path is not None else None
+    return PHONEME_TABLE
+
+
+def syllable_converter(cache: SyllableCache | None = SYLLABLE_CACHE, table=None):
+    """Hàm chuyển âm tiết theo tầng: cache LRU -> bảng tra -> bộ luật.
+
+    Cache đứng trước vì tra dict rẻ hơn NFC + crc32 + đọc mmap của bảng tra;
+    kết quả tra bảng được lưu vào cache như kết quả của bộ luật.
+    """
+    if cache is not None:
+        if table is None:
+            return cache.convert
+        cached = cache.convert
+        return lambda token: cached(token, table)
+    if table is None:
+        return convert_syllable
+    lookup = table.get
+
+    def convert(token: str) -> str:
+        hit = lookup(token)
+        return convert_syllable(token) if hit is None else hit
+
+    return convert
+
+
+def vn_to_phonemic(text: str, cache: SyllableCache | None = SYLLABLE_CACHE) -> str:
+    convert = syllable_converter(cache, PHONEME_TABLE)
+    return _TOKEN_RE.sub(lambda m: convert(m.group()), text)
+
+
+def verify_against_reference(syllables):
+    """So sánh trie đã biên dịch với pipeline gốc, trả về các âm tiết lệch"""
+    mismatches = []
+    for syl in syllables:
+        for tok in (syl, syl.upper(), syl.capitalize()):
+            expected = convert_word_with_tone(tok)
+            got = convert_syllable(tok)
+            if got != expected:
+                mismatches.append((tok, expected, got))
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python phonemic.py [unique_syllables.csv]
+    csv_path = (
+        Path(sys.argv[1])
+        if len(sys.argv) > 1
+        else Path(__file__).parent.parent / "Project_2" / "unique_syllables.csv"
+    )
+    syllables = load_syllables(csv_path)
+    mismatches = verify_against_reference(syllables)
+    for tok, expected, got in mismatches[:20]:
+        print(f"MISMATCH {tok!r}: expected {expected!r}, got {got!r}")
+    print(f"Checked {len(syllables)} syllables, {len(mismatches)} mismatches.")
+    sys.exit(1 if mismatches else 0)
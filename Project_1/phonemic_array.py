@@ -0,0 +1,74 @@
+import numpy as np
+
+import phonemic
+from phonemic import SYLLABLE_CACHE, strip_tone_and_get_number, syllable_converter
+
+try:
+    import pandas as pd
+except ImportError:  # pandas là tùy chọn, chỉ cần cho phonemize_column
+    pd = None
+
+TONE_MISSING = 0  # giá trị thanh cho ô rỗng (None/NaN)
+
+
+def _factorize(values):
+    """Trả về (mã của từng phần tử, các giá trị khác nhau); mã -1 là ô rỗng.
+
+    Mọi giá trị không phải str (None, NaN, số...) đều là ô rỗng, ở cả hai nhánh;
+    kiểu chỉ được kiểm tra trên các giá trị khác nhau, không trên từng phần tử.
+    """
+    arr = np.asarray(values, dtype=object)
+    if pd is not None:
+        # pd.factorize đã cho mã -1 với None/NaN
+        codes, uniques = pd.factorize(arr)
+    else:
+        # dict giữ thứ tự xuất hiện như pd.factorize; tra mã bằng map ở mức C
+        first_seen = {v: i for i, v in enumerate(dict.fromkeys(arr))}
+        uniques = np.array(list(first_seen), dtype=object)
+        codes = np.fromiter(map(first_seen.__getitem__, arr), dtype=np.intp, count=len(arr))
+    is_str = np.fromiter((isinstance(u, str) for u in uniques), dtype=bool, count=len(uniques))
+    if not is_str.all():
+        # Đánh số lại chỉ các giá trị str; phần tử cuối của remap cho mã -1 sẵn có
+        remap = np.full(len(uniques) + 1, -1, dtype=np.intp)
+        remap[:-1][is_str] = np.arange(np.count_nonzero(is_str))
+        codes = remap[codes]
+        uniques = np.asarray(uniques, dtype=object)[is_str]
+    return np.asarray(codes, dtype=np.intp), np.asarray(uniques, dtype=object)
+
+
+def _broadcast(codes, unique_results, fill, dtype):
+    # Thêm một phần tử cuối cho ô rỗng để mã -1 trỏ vào đó
+    table = np.empty(len(unique_results) + 1, dtype=dtype)
+    table[:-1] = unique_results
+    table[-1] = fill
+    return table[codes]
+
+
+def phonemize_array(values, cache=SYLLABLE_CACHE):
+    """Chuyển cả mảng token, mỗi giá trị khác nhau chỉ chuyển một lần.
+
+    Trả về (mảng phiên âm dtype=object, mảng số thanh int8) cùng độ dài đầu vào.
+    """
+    codes, uniques = _factorize(values)
+    convert = syllable_converter(cache, phonemic.PHONEME_TABLE)
+    phonemes = [convert(u) for u in uniques]
+    tones = [strip_tone_and_get_number(u)[1] for u in uniques]
+    return (
+        _broadcast(codes, phonemes, None, object),
+        _broadcast(codes, tones, TONE_MISSING, np.int8),
+    )
+
+
+def tone_numbers(values):
+    """Số thanh (1-6) của từng token dưới dạng mảng int8; ô rỗng là TONE_MISSING"""
+    codes, uniques = _factorize(values)
+    tones = [strip_tone_and_get_number(u)[1] for u in uniques]
+    return _broadcast(codes, tones, TONE_MISSING, np.int8)
+
+
+def phonemize_column(series, cache=SYLLABLE_CACHE):
+    """Chuyển một cột pandas, trả về DataFrame hai cột `phoneme` và `tone`"""
+    if pd is None:
+        raise ImportError("phonemize_column cần pandas")
+    phonemes, tones = phonemize_array(series.to_numpy(dtype=object), cache)
+    return pd.DataFrame({"phoneme": phonemes, "tone": tones}, index=series.index)
@@ -0,0 +1,131 @@
+import argparse
+import os
+import re
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+import phonemic
+from phonemic import SyllableCache, syllable_converter
+
+PROJECT_2 = Path(__file__).parent.parent / "Project_2"
+
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+# Trạng thái riêng của mỗi worker, khởi tạo một lần trong _init_worker
+_worker = {}
+
+
+def _init_worker(table_path, cache_size):
+    """Mỗi worker tự mmap bảng tra và tạo cache riêng; trie luật đã được
+    biên dịch sẵn khi import phonemic nên không phải gửi kèm từng task."""
+    table = phonemic.open_phoneme_table(table_path) if table_path else None
+    _worker["convert"] = syllable_converter(SyllableCache(cache_size), table)
+
+
+def _phonemize_item(item):
+    start = time.perf_counter()
+    if isinstance(item, os.PathLike):
+        with open(item, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+    else:
+        text = item
+    convert = _worker["convert"]
+    out = _TOKEN_RE.sub(lambda m: convert(m.group()), text)
+    return out, os.getpid(), len(text.encode("utf-8")), time.perf_counter() - start
+
+
+def iter_phonemize(
+    items,
+    processes=None,
+    chunksize=16,
+    table_path=phonemic.PHONEME_TABLE_PATH,
+    cache_size=65536,
+    stats=None,
+):
+    """Chuyển song song một tập văn bản (str) hoặc file (Path), giữ đúng thứ tự đầu vào.
+
+    Nếu truyền dict `stats`, thống kê theo từng worker (pid) được ghi vào đó:
+    số task, số byte và thời gian xử lý.
+    """
+    if table_path is not None and not Path(table_path).exists():
+        table_path = None
+    with Pool(processes, initializer=_init_worker, initargs=(table_path, cache_size)) as pool:
+        for out, pid, nbytes, seconds in pool.imap(_phonemize_item, items, chunksize):
+            if stats is not None:
+                s = stats.setdefault(pid, {"tasks": 0, "bytes": 0, "seconds": 0.0})
+                s["tasks"] += 1
+                s["bytes"] += nbytes
+                s["seconds"] += seconds
+            yield out
+
+
+def phonemize_batch(items, processes=None, chunksize=16, stats=None, **kwargs):
+    return list(iter_phonemize(items, processes, chunksize, stats=stats, **kwargs))
+
+
+def print_worker_stats(stats):
+    for pid, s in sorted(stats.items()):
+        mb = s["bytes"] / 1e6
+        rate = mb / s["seconds"] if s["seconds"] else 0.0
+        print(f"   worker {pid}: {s['tasks']} task, {mb:.2f} MB, {s['seconds']:.2f}s ({rate:.2f} MB/s)")
+
+
+def load_headword_documents(dict_path=PROJECT_2 / "VDic_uni.txt", words_per_doc=200):
+    """Corpus benchmark: headword của từ điển Project_2, gom thành các văn bản"""
+    sys.path.insert(0, str(PROJECT_2))
+    from syllables import iter_headwords, load_dictionary
+
+    headwords = iter_headwords(load_dictionary(dict_path))
+    return [
+        " ".join(headwords[i : i + words_per_doc])
+        for i in range(0, len(headwords), words_per_doc)
+    ]
+
+
+def benchmark(processes_list, chunksize, repeat=10):
+    docs = load_headword_documents() * repeat
+    total_mb = sum(len(d.encode("utf-8")) for d in docs) / 1e6
+    expected = [phonemic.vn_to_phonemic(d) for d in docs[: len(docs) // repeat]]
+    base = None
+    for n in processes_list:
+        stats = {}
+        start = time.perf_counter()
+        results = phonemize_batch(docs, n, chunksize, stats=stats)
+        elapsed = time.perf_counter() - start
+        if results[: len(expected)] != expected:
+            raise AssertionError("Kết quả song song khác vn_to_phonemic")
+        base = base or elapsed
+        print(
+            f"{n} tiến trình: {total_mb:.2f} MB trong {elapsed:.2f}s "
+            f"({total_mb / elapsed:.2f} MB/s, tăng tốc x{base / elapsed:.2f})"
+        )
+        print_worker_stats(stats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chuyển phiên âm song song nhiều văn bản")
+    parser.add_argument("files", nargs="*", type=Path, help="các file cần chuyển")
+    parser.add_argument("-o", "--output-dir", type=Path, help="thư mục ghi kết quả")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=16, help="số văn bản mỗi lần gửi worker")
+    parser.add_argument("--bench", action="store_true", help="benchmark trên headword từ điển Project_2")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(sorted({1, 2, 4, args.processes}), args.chunksize)
+        sys.exit(0)
+    if not args.files or args.output_dir is None:
+        parser.error("cần danh sách file và --output-dir (hoặc --bench)")
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    stats = {}
+    start = time.perf_counter()
+    for path, out in zip(args.files, iter_phonemize(args.files, args.processes, args.chunksize, stats=stats)):
+        with open(args.output_dir / path.name, "w", encoding="utf-8", newline="") as f:
+            f.write(out)
+    elapsed = time.perf_counter() - start
+    mb = sum(s["bytes"] for s in stats.values()) / 1e6
+    print(f"Đã chuyển {len(args.files)} file, {mb:.2f} MB trong {elapsed:.2f}s ({mb / elapsed:.2f} MB/s)")
+    print_worker_stats(stats)
@@ -0,0 +1,97 @@
+import argparse
+import codecs
+import re
+import sys
+import time
+
+import phonemic
+from phonemic import SYLLABLE_CACHE, syllable_converter
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+
+def _trailing_word_start(buf):
+    """Vị trí bắt đầu của từ cuối buf (len(buf) nếu buf không kết thúc bằng chữ/số/"_",
+    tức ký tự khớp \\w của re). Duyệt lùi từ cuối nên chi phí chỉ theo độ dài từ cuối,
+    không theo độ dài đoạn."""
+    i = len(buf)
+    while i and (buf[i - 1].isalnum() or buf[i - 1] == "_"):
+        i -= 1
+    return i
+
+
+def iter_phonemic(chunks, cache=SYLLABLE_CACHE):
+    """Chuyển một luồng các đoạn text, trả về từng đoạn đã chuyển.
+
+    Từ cuối mỗi đoạn có thể bị cắt ngang nên được giữ lại và ghép vào đoạn
+    sau; bộ nhớ chỉ phụ thuộc kích thước đoạn, không phụ thuộc cả file.
+    """
+    convert = syllable_converter(cache, phonemic.PHONEME_TABLE)
+    sub = _TOKEN_RE.sub
+
+    def repl(m):
+        return convert(m.group())
+
+    carry = ""
+    for chunk in chunks:
+        buf = carry + chunk if carry else chunk
+        cut = _trailing_word_start(buf)
+        carry = buf[cut:]
+        if cut:
+            yield sub(repl, buf[:cut])
+    if carry:
+        yield sub(repl, carry)
+
+
+def iter_decoded_chunks(f, chunk_size=CHUNK_SIZE, counter=None):
+    """Đọc file nhị phân theo từng khối, giải mã UTF-8 tăng dần"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while True:
+        data = f.read(chunk_size)
+        if counter is not None:
+            counter[0] += len(data)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def convert_stream(src, dst, chunk_size=CHUNK_SIZE, cache=SYLLABLE_CACHE):
+    """Chuyển từ luồng nhị phân src sang luồng nhị phân dst, trả về số byte đã đọc"""
+    counter = [0]
+    chunks = iter_decoded_chunks(src, chunk_size, counter)
+    for piece in iter_phonemic(chunks, cache):
+        dst.write(piece.encode("utf-8"))
+    dst.flush()
+    return counter[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chuyển văn bản tiếng Việt sang phiên âm")
+    parser.add_argument("input", nargs="?", default="-", help="file vào (mặc định stdin)")
+    parser.add_argument("-o", "--output", default="-", help="file ra (mặc định stdout)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="số byte mỗi khối")
+    args = parser.parse_args()
+
+    src = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    dst = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    start = time.perf_counter()
+    try:
+        nbytes = convert_stream(src, dst, args.chunk_size)
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+        if dst is not sys.stdout.buffer:
+            dst.close()
+    elapsed = time.perf_counter() - start
+    mb = nbytes / 1e6
+    print(
+        f"Đã xử lý {mb:.2f} MB trong {elapsed:.2f}s ({mb / elapsed if elapsed else 0:.2f} MB/s)",
+        file=sys.stderr,
+    )
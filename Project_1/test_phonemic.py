@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+
+from phonemic import (
+    SyllableCache,
+    convert_syllable,
+    load_syllables,
+    syllable_converter,
+    verify_against_reference,
+)
+
+UNIQUE_SYLLABLES = Path(__file__).parent.parent / "Project_2" / "unique_syllables.csv"
+
+
+class CountingTable:
+    def __init__(self, entries):
+        self.entries = entries
+        self.lookups = 0
+
+    def get(self, token, default=None):
+        self.lookups += 1
+        return self.entries.get(token, default)
+
+
+def test_cache_is_checked_before_table():
+    table = CountingTable({"toán": "from-table"})
+    cache = SyllableCache(16)
+    convert = syllable_converter(cache, table)
+
+    assert convert("toán") == "from-table"
+    assert convert("toán") == "from-table"
+    assert table.lookups == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.strip_tone("toán") == ("toan", 5)
+
+
+def test_table_miss_falls_back_to_rules():
+    table = CountingTable({})
+    convert = syllable_converter(SyllableCache(16), table)
+    assert convert("học") == convert_syllable("học")
+    assert convert("...") == "..."
+
+
+def test_compiled_rules_match_reference_pipeline():
+    syllables = load_syllables(UNIQUE_SYLLABLES)
+    assert syllables
+    assert verify_against_reference(syllables) == []
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SyllableCache(2)
+    for token in ("ba", "má", "ba", "cá"):  # "ba" vừa được dùng lại nên "má" bị loại
+        cache.convert(token)
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "size": 2, "maxsize": 2}
+    cache.convert("ba")
+    assert cache.hits == 2
+
+    cache.resize(1)
+    assert len(cache) == 1 and cache.evictions == 2
+    with pytest.raises(ValueError):
+        cache.resize(0)
+
+
+def test_warm_is_not_counted_and_results_match_rules():
+    syllables = load_syllables(UNIQUE_SYLLABLES)
+    cache = SyllableCache(len(syllables))
+    assert cache.warm(syllables) == len(syllables)
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert all(cache.convert(s) == convert_syllable(s) for s in syllables)
+    assert cache.stats()["hits"] == len(syllables)
@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+import pytest
+
+import phonemic_array
+from phonemic_array import TONE_MISSING, phonemize_array, tone_numbers
+
+MIXED = ["toán", 3, None, 2.5, float("nan"), "học", "toán", True]
+TEXT = [True, False, False, False, False, True, True, False]
+
+
+@pytest.fixture(params=["pandas", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "pandas":
+        pytest.importorskip("pandas")
+    else:
+        monkeypatch.setattr(phonemic_array, "pd", None)
+    return request.param
+
+
+def test_mixed_types_are_missing(backend):
+    phonemes, tones = phonemize_array(MIXED)
+    assert len(phonemes) == len(tones) == len(MIXED)
+    for phoneme, tone, is_text in zip(phonemes, tones, TEXT):
+        if is_text:
+            assert isinstance(phoneme, str)
+        else:
+            assert phoneme is None
+            assert tone == TONE_MISSING
+    assert phonemes[0] == phonemes[6]
+    assert tones.dtype == np.int8
+
+
+def test_backends_agree(monkeypatch):
+    pytest.importorskip("pandas")
+    with_pandas = phonemize_array(MIXED)
+    monkeypatch.setattr(phonemic_array, "pd", None)
+    without_pandas = phonemize_array(MIXED)
+    assert list(with_pandas[0]) == list(without_pandas[0])
+    assert list(with_pandas[1]) == list(without_pandas[1])
+
+
+def test_tone_numbers_numeric_series(backend):
+    tones = tone_numbers(np.array([1, 2, math.nan], dtype=object))
+    assert list(tones) == [TONE_MISSING] * 3
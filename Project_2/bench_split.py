@@ -0,0 +1,33 @@
+import sys
+import time
+
+from syllables import (
+    load_unique_syllables,
+    split_syllable,
+    split_syllable_linear,
+)
+
+
+def calls_per_second(func, items, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for s in items:
+            func(s)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+if __name__ == "__main__":
+    # python bench_split.py [unique_syllables.csv]
+    syllables = load_unique_syllables(*sys.argv[1:2])
+
+    mismatches = [s for s in syllables if split_syllable(s) != split_syllable_linear(s)]
+    if mismatches:
+        print(f"Kết quả khác nhau ở {len(mismatches)} âm tiết, vd. {mismatches[:5]}")
+        sys.exit(1)
+
+    print(f"{len(syllables)} âm tiết")
+    b = calls_per_second(split_syllable_linear, syllables)
+    a = calls_per_second(split_syllable, syllables)
+    print(f"split_syllable: {b:,.0f} -> {a:,.0f} lần/giây (x{a / b:.2f})")
@@ -0,0 +1,139 @@
+import argparse
+import csv
+import os
+import time
+from collections import Counter
+from multiprocessing import Pool
+from pathlib import Path
+
+from syllables import DICT_PATH, split_syllable, strip_tone, syllabify
+
+STAT_NAMES = ["syllables", "onsets", "rhymes", "tones", "bigrams", "trigrams"]
+
+
+def byte_ranges(path, n_shards):
+    """Chia file thành n_shards khoảng byte [start, end) gần bằng nhau"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    n_shards = max(1, min(n_shards, size))
+    step = -(-size // n_shards)
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def iter_shard_lines(path, start, end):
+    """Các dòng *bắt đầu* trong [start, end); dòng cắt ngang ranh giới thuộc khoảng trước"""
+    with open(path, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()  # bỏ phần dòng thuộc khoảng trước (không bỏ gì nếu start là đầu dòng)
+        pos = f.tell()
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line.decode("utf-8")
+
+
+def count_shard(args):
+    """Bước map: đếm âm tiết và n-gram (trong phạm vi từng dòng) của một khoảng byte"""
+    path, start, end, headwords_only = args
+    syllables, bigrams, trigrams = Counter(), Counter(), Counter()
+    for line in iter_shard_lines(path, start, end):
+        line = line.strip()
+        if headwords_only:
+            line = line.split("\t", 1)[0].strip()
+        if not line:
+            continue
+        syls = syllabify(line)
+        syllables.update(syls)
+        if len(syls) > 1:
+            bigrams.update(zip(syls, syls[1:]))
+        if len(syls) > 2:
+            trigrams.update(zip(syls, syls[1:], syls[2:]))
+    return syllables, bigrams, trigrams
+
+
+def reduce_counts(partials):
+    """Bước reduce: cộng các Counter, suy ra âm đầu/vần/thanh từ tần suất âm tiết"""
+    syllables, bigrams, trigrams = Counter(), Counter(), Counter()
+    for s, b, t in partials:
+        syllables.update(s)
+        bigrams.update(b)
+        trigrams.update(t)
+
+    onsets, rhymes, tones = Counter(), Counter(), Counter()
+    for syl, count in syllables.items():
+        parts = split_syllable(syl)
+        if not parts:
+            continue
+        onset, _, _, _, tone = parts
+        onsets[onset] += count
+        rhymes[strip_tone(syl)[0][len(onset) :]] += count
+        tones[tone] += count
+    return {
+        "syllables": syllables,
+        "onsets": onsets,
+        "rhymes": rhymes,
+        "tones": tones,
+        "bigrams": bigrams,
+        "trigrams": trigrams,
+    }
+
+
+def corpus_stats(path, processes=None, shards_per_process=4, headwords_only=False):
+    processes = processes or os.cpu_count()
+    tasks = [
+        (path, start, end, headwords_only)
+        for start, end in byte_ranges(path, processes * shards_per_process)
+    ]
+    if processes == 1:
+        return reduce_counts(map(count_shard, tasks))
+    with Pool(processes) as pool:
+        return reduce_counts(pool.imap_unordered(count_shard, tasks))
+
+
+def write_stats(stats, out_dir):
+    """Mỗi thống kê một file CSV dạng cột (các cột khóa + count), sắp theo tần suất giảm dần"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    headers = {
+        "syllables": ["syllable"],
+        "onsets": ["onset"],
+        "rhymes": ["rhyme"],
+        "tones": ["tone"],
+        "bigrams": ["w1", "w2"],
+        "trigrams": ["w1", "w2", "w3"],
+    }
+    for name in STAT_NAMES:
+        rows = sorted(stats[name].items(), key=lambda kv: (-kv[1], kv[0]))
+        with open(out_dir / f"{name}.csv", "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(headers[name] + ["count"])
+            for key, count in rows:
+                w.writerow([*(key if isinstance(key, tuple) else (key,)), count])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Thống kê tần suất âm tiết/n-gram trên corpus lớn")
+    parser.add_argument("corpus", nargs="?", default=DICT_PATH, help="file văn bản UTF-8")
+    parser.add_argument("-o", "--output-dir", default="corpus_stats", help="thư mục CSV kết quả")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--headwords", action="store_true", help="chỉ lấy cột headword (file dạng VDic)")
+    parser.add_argument("--check", action="store_true", help="so sánh với kết quả chạy một tiến trình")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = corpus_stats(args.corpus, args.processes, headwords_only=args.headwords)
+    elapsed = time.perf_counter() - start
+    write_stats(stats, args.output_dir)
+    print(f"Đã thống kê {args.corpus} trong {elapsed:.2f}s với {args.processes} tiến trình")
+    for name in STAT_NAMES:
+        print(f"   {name}: {len(stats[name])} khóa, tổng {sum(stats[name].values())}")
+
+    if args.check:
+        single = reduce_counts([count_shard((args.corpus, 0, os.path.getsize(args.corpus), args.headwords))])
+        if single != stats:
+            raise SystemExit("Kết quả song song khác kết quả một tiến trình")
+        print("Khớp với kết quả một tiến trình.")
@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import sqlite3
+import sys
+from pathlib import Path
+
+from syllables import (
+    CODAS,
+    DICT_PATH,
+    MEDIALS,
+    ONSETS,
+    TONE_CODE,
+    VOWELS_BASE,
+    iter_dictionary_lines,
+    iter_headword_stream,
+    split_syllable,
+    syllabify,
+)
+
+PROJECT_1 = Path(__file__).parent.parent / "Project_1"
+sys.path.insert(0, str(PROJECT_1))
+
+from phonemic import convert_syllable, rules_fingerprint  # noqa: E402
+
+INDEX_PATH = Path(__file__).parent / "syllable_index.sqlite"
+BATCH_SIZE = 500  # số tham số tối đa mỗi câu truy vấn IN (...)
+
+
+def tables_hash() -> str:
+    """Hash của bảng ONSETS/CODAS/TONE_CODE và bộ luật phiên âm Project_1"""
+    tables = (ONSETS, CODAS, MEDIALS, sorted(VOWELS_BASE), sorted(TONE_CODE.items()))
+    h = hashlib.sha256(repr(tables).encode("utf-8"))
+    h.update(rules_fingerprint())
+    return h.hexdigest()
+
+
+class SyllableIndex:
+    """Chỉ mục lưu trên đĩa (SQLite): âm tiết -> (tuple split_syllable, phiên âm).
+
+    Chỉ mục tự xóa khi hash các bảng luật thay đổi, nên kết quả luôn khớp
+    với split_syllable/convert_syllable hiện tại.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS syllables (
+                syllable TEXT PRIMARY KEY,
+                onset TEXT, medial TEXT, nucleus TEXT, coda TEXT, tone INTEGER,
+                phoneme TEXT NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'tables_hash'").fetchone()
+        current = tables_hash()
+        self.invalidated = row is not None and row[0] != current
+        if row is None or self.invalidated:
+            with self.conn:
+                self.conn.execute("DELETE FROM syllables")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('tables_hash', ?)", (current,)
+                )
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM syllables").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _fetch(self, syllables):
+        syllables = list(syllables)
+        for i in range(0, len(syllables), BATCH_SIZE):
+            batch = syllables[i : i + BATCH_SIZE]
+            marks = ",".join("?" * len(batch))
+            yield from self.conn.execute(
+                f"SELECT * FROM syllables WHERE syllable IN ({marks})", batch
+            )
+
+    def update(self, syllables) -> int:
+        """Thêm các âm tiết chưa có trong chỉ mục, trả về số âm tiết mới"""
+        pending = set(syllables)
+        pending.difference_update(row[0] for row in self._fetch(pending))
+        rows = []
+        for syl in pending:
+            parts = split_syllable(syl) or (None,) * 5
+            rows.append((syl, *parts, convert_syllable(syl)))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO syllables VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def lookup(self, syllables) -> dict:
+        """{âm tiết: (tuple split_syllable hoặc None, phiên âm)}, cập nhật nếu thiếu"""
+        syllables = set(syllables)
+        self.update(syllables)
+        out = {}
+        for syl, onset, medial, nucleus, coda, tone, phoneme in self._fetch(syllables):
+            parts = None if nucleus is None else (onset, medial, nucleus, coda, tone)
+            out[syl] = (parts, phoneme)
+        return out
+
+
+def iter_corpus_syllables(paths):
+    """Âm tiết từ từ điển dạng VDic (headword<TAB>...) hoặc file CSV một cột"""
+    for path in paths:
+        for head in iter_headword_stream(iter_dictionary_lines(path)):
+            yield from syllabify(head)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cập nhật chỉ mục âm tiết trên đĩa")
+    parser.add_argument("inputs", nargs="*", default=[DICT_PATH], help="các file từ điển/corpus")
+    parser.add_argument("--db", default=INDEX_PATH, help="file SQLite của chỉ mục")
+    args = parser.parse_args()
+
+    with SyllableIndex(args.db) as index:
+        if index.invalidated:
+            print("Bảng luật đã thay đổi, chỉ mục cũ đã bị xóa.")
+        before = len(index)
+        added = index.update(iter_corpus_syllables(args.inputs))
+        print(f"Chỉ mục {args.db}: {before} âm tiết có sẵn, thêm {added} âm tiết mới.")
@@ -0,0 +1,336 @@
+import argparse
+import re
+from itertools import product
+
+from syllables import (
+    CODAS,
+    MEDIALS,
+    ONSETS,
+    TONE_CODE,
+    TONED_VOWEL,
+    TONES,
+    VOWELS_BASE,
+    load_unique_syllables,
+)
+
+FIELDS = ["onset", "medial", "nucleus", "coda", "tone"]
+
+
+class Bitset:
+    """Tập mã âm tiết dạng bit; phép toán tập hợp chạy trên số nguyên Python (mức C)"""
+
+    __slots__ = ("value", "nbits", "_bytes")
+
+    def __init__(self, value: int, nbits: int):
+        self.value = value
+        self.nbits = nbits
+        self._bytes = None
+
+    def __contains__(self, code: int) -> bool:
+        if self._bytes is None:
+            self._bytes = self.value.to_bytes((self.nbits + 7) // 8, "little")
+        return 0 <= code < self.nbits and (self._bytes[code >> 3] >> (code & 7)) & 1 == 1
+
+    def __len__(self):
+        return self.value.bit_count()
+
+    def __and__(self, other):
+        return Bitset(self.value & other.value, self.nbits)
+
+    def __or__(self, other):
+        return Bitset(self.value | other.value, self.nbits)
+
+    def __sub__(self, other):
+        return Bitset(self.value & ~other.value, self.nbits)
+
+    def __eq__(self, other):
+        return isinstance(other, Bitset) and self.value == other.value
+
+    def __iter__(self):
+        """Các mã thuộc tập, theo thứ tự tăng dần"""
+        data = self.value.to_bytes((self.nbits + 7) // 8, "little")
+        for i, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                yield (i << 3) | (low.bit_length() - 1)
+                byte ^= low
+
+
+_DIACRITIC_VOWELS = "ăâêôơư"
+_VOWEL_RE = re.compile("[" + "".join(TONE_CODE) + "]")
+
+
+def _longest_first(items):
+    return sorted(items, key=len, reverse=True)
+
+
+def _strip_first_tone(s: str) -> tuple[str, int, int]:
+    """Bỏ dấu của ký tự mang thanh đầu tiên: (chuỗi, thanh, vị trí); các dấu thanh sau giữ nguyên"""
+    for i, ch in enumerate(s):
+        tone, base = TONE_CODE.get(ch, (0, ch))
+        if tone:
+            return s[:i] + base + s[i + 1 :], tone, i
+    return s, 0, -1
+
+
+def _tone_position(core: str, coda: str) -> int | None:
+    """Vị trí đặt dấu thanh trong âm đệm + âm chính theo quy tắc kiểu mới (hoà, thuý, người)"""
+    marked = [i for i, ch in enumerate(core) if ch in _DIACRITIC_VOWELS]
+    if marked:
+        return marked[-1]
+    vowels = [i for i, ch in enumerate(core) if ch in VOWELS_BASE]
+    if not vowels:
+        return None
+    if coda or len(vowels) == 1 or core in ("oa", "oe", "uy"):
+        return vowels[-1]
+    return vowels[1] if len(vowels) == 3 else vowels[0]
+
+
+class SyllableSpace:
+    """Không gian [Phụ_âm_đầu * Âm_Đệm * Âm_Chính * Âm_Cuối * Thanh_điệu] mã hóa thành số nguyên.
+
+    Mỗi thành phần chiếm một trường bit (chỉ số trong danh mục tương ứng), nên
+    tập "mọi âm tiết có thanh t" được dựng bằng vài phép dịch bit, không phải
+    sinh tuple cho từng tổ hợp. Âm chính là cả chuỗi nguyên âm giữa âm đệm và
+    âm cuối ("ươi", "iê", "ay"), danh mục mặc định lấy từ các âm tiết trong từ
+    điển; một mã chỉ hợp lệ khi compose rồi tách lại cho đúng mã đó.
+    """
+
+    def __init__(self, onsets=None, medials=None, nuclei=None, codas=None, tones=None, syllables=None):
+        onsets = ["", *ONSETS] if onsets is None else list(onsets)
+        medials = list(MEDIALS) if medials is None else list(medials)
+        codas = ["", *CODAS] if codas is None else list(codas)
+        tones = list(TONES) if tones is None else list(tones)
+        self._onsets = _longest_first(onsets)
+        self._codas = _longest_first(codas)
+        self._medials = set(filter(None, medials))
+        # Đầu vần -> các âm đầu có thể nuốt nó thành âm đầu dài hơn, vd. "i" -> ["g"] ("g" + "i" = "gi")
+        self._swallowers = {}
+        for oi, o in enumerate(onsets):
+            for p in onsets:
+                if len(p) > len(o) and p.startswith(o):
+                    self._swallowers.setdefault(p[len(o):], []).append((oi, o))
+        self._max_swallow = max(map(len, self._swallowers), default=0)
+
+        # Vị trí dấu thanh khác quy tắc (từ mượn, viết tắt) lấy từ các âm tiết quan sát được
+        self.tone_marks = {}
+        seen_nuclei = set()
+        for syl in load_unique_syllables() if syllables is None else syllables:
+            split = self._split(syl)
+            if split is None:
+                continue
+            _, medial, nucleus, coda, tone, pos = split
+            seen_nuclei.add(nucleus)
+            if tone and pos != _tone_position(medial + nucleus, coda):
+                self.tone_marks[(medial + nucleus, coda)] = pos
+
+        self.inventory = {
+            "onset": onsets,
+            "medial": medials,
+            "nucleus": sorted(seen_nuclei) if nuclei is None else list(nuclei),
+            "coda": codas,
+            "tone": tones,
+        }
+        self.index = {f: {v: i for i, v in enumerate(vals)} for f, vals in self.inventory.items()}
+        self.width = {f: max(1, (len(vals) - 1).bit_length()) for f, vals in self.inventory.items()}
+        self.shift = {}
+        shift = 0
+        for f in reversed(FIELDS):
+            self.shift[f] = shift
+            shift += self.width[f]
+        self.nbits = 1 << shift
+        self.possible = self._round_trip_codes()
+
+    @classmethod
+    def from_components(cls, components):
+        """Danh mục lấy từ các thành phần quan sát được (vd. stats["components"] của syllables.py)"""
+        return cls(**{
+            key: sorted(components[f]) for key, f in
+            [("onsets", "onset"), ("medials", "medial"), ("nuclei", "nucleus"),
+             ("codas", "coda"), ("tones", "tone")]
+        })
+
+    def _split_plain(self, plain: str):
+        """Tách vần đã bỏ dấu thanh: (âm đệm, âm chính, âm cuối)"""
+        coda = next((c for c in self._codas if plain.endswith(c) and len(plain) > len(c)), None)
+        if coda is None:
+            return None
+        core = plain[: len(plain) - len(coda)]
+        medial = core[0] if len(core) > 1 and core[0] in self._medials else ""
+        return medial, core[len(medial):], coda
+
+    def _split_rest(self, rest: str):
+        """Tách phần sau âm đầu: (âm đệm, âm chính, âm cuối, thanh, vị trí dấu thanh)"""
+        plain, tone, pos = _strip_first_tone(rest)
+        split = self._split_plain(plain)
+        return None if split is None else (*split, tone, pos)
+
+    def _onset_of(self, s: str) -> str | None:
+        # Khớp dài nhất mà phần còn lại vẫn có nguyên âm ("gìn" -> "g" + "in"),
+        # không có thì khớp dài nhất còn chừa lại ít nhất một chữ (từ viết tắt)
+        fallback = None
+        for o in self._onsets:
+            if len(s) > len(o) and s.startswith(o):
+                if _VOWEL_RE.search(s, len(o)):
+                    return o
+                if fallback is None:
+                    fallback = o
+        return fallback
+
+    def _split(self, syllable: str):
+        s = syllable.lower().strip()
+        onset = self._onset_of(s)
+        if onset is None:
+            return None
+        rest = self._split_rest(s[len(onset):])
+        return None if rest is None else (onset, *rest)
+
+    def _rhyme(self, medial, nucleus, coda, tone) -> str | None:
+        core = medial + nucleus
+        if tone:
+            pos = self.tone_marks.get((core, coda))
+            if pos is None:
+                pos = _tone_position(core, coda)
+            toned = None if pos is None else TONED_VOWEL.get((tone, core[pos]))
+            if toned is None:
+                return None
+            core = core[:pos] + toned + core[pos + 1 :]
+        return core + coda
+
+    def _round_trip_codes(self) -> Bitset:
+        """Tập các mã mà compose rồi tách lại cho đúng mã đó.
+
+        Phần vần không phụ thuộc âm đầu nên chỉ kiểm tra một lần rồi nhân bản
+        cho mọi âm đầu; chỉ khi âm đầu có thể nuốt thêm chữ đầu vần (vd. "g" +
+        "i...", "q" + "u...") hay vần không có nguyên âm mới tách lại âm đầu
+        của cả chuỗi.
+        """
+        onset_shift = self.shift["onset"]
+        low = bytearray(1 << (onset_shift - 3))
+        fixes = []  # (mã, có thuộc tập không) cho các cặp âm đầu + vần phải ghép thử
+        for (mi, m), (ni, n), (ci, c) in product(
+            *(enumerate(self.inventory[f]) for f in ("medial", "nucleus", "coda"))
+        ):
+            # Tách sai cấu trúc khi chưa đặt dấu thì đặt dấu rồi cũng sai
+            if self._split_plain(m + n + c) != (m, n, c):
+                continue
+            base = mi << self.shift["medial"] | ni << self.shift["nucleus"] | ci << self.shift["coda"]
+            for ti, t in enumerate(self.inventory["tone"]):
+                rhyme = self._rhyme(m, n, c, t)
+                if rhyme is None or (self._split_rest(rhyme) or ())[:4] != (m, n, c, t):
+                    continue
+                code = base | ti << self.shift["tone"]
+                if _VOWEL_RE.search(rhyme):
+                    low[code >> 3] |= 1 << (code & 7)
+                    doubtful = [
+                        pair
+                        for k in range(1, min(self._max_swallow, len(rhyme) - 1) + 1)
+                        for pair in self._swallowers.get(rhyme[:k], ())
+                    ]
+                else:
+                    doubtful = enumerate(self.inventory["onset"])
+                for oi, o in doubtful:
+                    fixes.append((code | oi << onset_shift, self._onset_of(o + rhyme) == o))
+
+        # Trường âm đầu là trường cao nhất: nhân bản phần thấp cho mọi âm đầu bằng lặp bytes
+        bits = bytearray(self.nbits // 8)
+        copies = low * len(self.inventory["onset"])
+        bits[: len(copies)] = copies
+        for code, ok in fixes:
+            if ok:
+                bits[code >> 3] |= 1 << (code & 7)
+            else:
+                bits[code >> 3] &= ~(1 << (code & 7))
+        return Bitset(int.from_bytes(bits, "little"), self.nbits)
+
+    def _product(self, ranges) -> Bitset:
+        # Dựng dần từ trường thấp nhất: mỗi bước dịch & OR bản sao của mẫu hiện tại;
+        # trường lấy trọn danh mục và khối đủ 1 byte thì nhân bản bằng lặp bytes
+        pattern = 1
+        for f in reversed(FIELDS):
+            shift = self.shift[f]
+            values = list(ranges[f])
+            if shift >= 3 and len(values) > 1 and values == list(range(len(values))):
+                block = pattern.to_bytes(1 << (shift - 3), "little")
+                pattern = int.from_bytes(block * len(values), "little")
+            else:
+                pattern = sum(pattern << (i << shift) for i in values)
+        return Bitset(pattern, self.nbits)
+
+    def encode(self, parts) -> int | None:
+        code = 0
+        for f, value in zip(FIELDS, parts):
+            i = self.index[f].get(value)
+            if i is None:
+                return None
+            code |= i << self.shift[f]
+        return code
+
+    def decode(self, code: int) -> tuple:
+        return tuple(
+            self.inventory[f][(code >> self.shift[f]) & ((1 << self.width[f]) - 1)]
+            for f in FIELDS
+        )
+
+    def code_of(self, syllable: str) -> int | None:
+        """Mã của âm tiết, None nếu không tách được hoặc ghép lại không ra đúng chuỗi ban đầu"""
+        split = self._split(syllable)
+        code = None if split is None else self.encode(split[:5])
+        if code is None or self.compose(code) != syllable.lower().strip():
+            return None
+        return code
+
+    def compose(self, code: int) -> str | None:
+        onset, medial, nucleus, coda, tone = self.decode(code)
+        rhyme = self._rhyme(medial, nucleus, coda, tone)
+        return None if rhyme is None else onset + rhyme
+
+    def bitset(self, syllables) -> Bitset:
+        """Tập mã của các âm tiết hợp lệ (vd. âm tiết có trong từ điển)"""
+        bits = bytearray(self.nbits // 8)
+        for syl in syllables:
+            code = self.code_of(syl)
+            if code is not None:
+                bits[code >> 3] |= 1 << (code & 7)
+        return Bitset(int.from_bytes(bits, "little"), self.nbits)
+
+    def where(self, **fixed) -> Bitset:
+        """Các tổ hợp có thành phần cố định, vd. where(tone=3, coda="ng")"""
+        ranges = {f: range(len(self.inventory[f])) for f in FIELDS}
+        for f, value in fixed.items():
+            i = self.index[f].get(value)
+            ranges[f] = [] if i is None else [i]
+        return self._product(ranges)
+
+    def is_possible(self, syllable: str) -> bool:
+        """Âm tiết là một tổ hợp khả dĩ: mã ghép lại đúng chuỗi ban đầu và thuộc tập bit"""
+        code = self.code_of(syllable)
+        return code is not None and code in self.possible
+
+
+def gap_report(space, attested):
+    """Số tổ hợp khả dĩ chưa được dùng, theo từng thanh và từng âm cuối"""
+    gaps = space.possible - attested
+    by_tone = {t: len(gaps & space.where(tone=t)) for t in space.inventory["tone"]}
+    by_coda = {c: len(gaps & space.where(coda=c)) for c in space.inventory["coda"]}
+    return gaps, by_tone, by_coda
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chỉ mục bit các âm tiết khả dĩ / có trong từ điển")
+    parser.add_argument("words", nargs="*", help="âm tiết cần kiểm tra")
+    parser.add_argument("--syllables", help="CSV âm tiết có trong từ điển (mặc định unique_syllables.csv)")
+    args = parser.parse_args()
+
+    syllables = load_unique_syllables(*filter(None, [args.syllables]))
+    space = SyllableSpace(syllables=syllables)
+    attested = space.bitset(syllables)
+    gaps, by_tone, by_coda = gap_report(space, attested)
+    print(f"Số tổ hợp khả dĩ: {len(space.possible)}")
+    print(f"Số tổ hợp có trong từ điển: {len(attested)}")
+    print(f"Số tổ hợp chưa xuất hiện: {len(gaps)}")
+    print("Theo thanh điệu:", by_tone)
+    print("Theo âm cuối:", by_coda)
+    for word in args.words:
+        code = space.code_of(word)
+        print(f"{word}: khả dĩ={space.is_possible(word)}, có trong từ điển={code is not None and code in attested}")
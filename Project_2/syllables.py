@@ -0,0 +1,359 @@
+from pathlib import Path
+import argparse
+import re
+import csv
+from collections import Counter
+from itertools import product
+
+DICT_PATH = Path(__file__).parent / "VDic_uni.txt"
+
+
+def load_dictionary(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        words = [line.strip() for line in f if line.strip()]
+    return words
+
+
+# Trích headword từ mỗi dòng
+def iter_headwords(lines):
+    headwords: list[str] = []
+    for i, line in enumerate(lines, 1):
+        if not line:
+            continue
+        head = line.split("\t", 1)[0].strip()
+        if head:
+            headwords.append(head)
+    return headwords
+
+
+# Tách headword thành âm tiết (theo khoảng trắng & dấu gạch nối), loại bỏ dấu câu
+punct_strip = '.,;:"\'()[]{}!?«»“”‘’'
+strip_table = str.maketrans("", "", punct_strip)
+
+
+def syllabify(word: str) -> list[str]:
+    parts = re.split(r"[\s-]+", word)
+    result = []
+    for part in parts:
+        cleaned = part.translate(strip_table)
+        if cleaned:
+            result.append(cleaned.lower())
+    return result
+
+
+# Thanh điệu
+TONE_CODE = {
+    "a": (0,"a"), "á": (1,"a"), "à": (2,"a"), "ả": (3,"a"), "ã": (4,"a"), "ạ": (5,"a"),
+    "ă": (0,"ă"), "ắ": (1,"ă"), "ằ": (2,"ă"), "ẳ": (3,"ă"), "ẵ": (4,"ă"), "ặ": (5,"ă"),
+    "â": (0,"â"), "ấ": (1,"â"), "ầ": (2,"â"), "ẩ": (3,"â"), "ẫ": (4,"â"), "ậ": (5,"â"),
+    "e": (0,"e"), "é": (1,"e"), "è": (2,"e"), "ẻ": (3,"e"), "ẽ": (4,"e"), "ẹ": (5,"e"),
+    "ê": (0,"ê"), "ế": (1,"ê"), "ề": (2,"ê"), "ể": (3,"ê"), "ễ": (4,"ê"), "ệ": (5,"ê"),
+    "i": (0,"i"), "í": (1,"i"), "ì": (2,"i"), "ỉ": (3,"i"), "ĩ": (4,"i"), "ị": (5,"i"),
+    "y": (0,"y"), "ý": (1,"y"), "ỳ": (2,"y"), "ỷ": (3,"y"), "ỹ": (4,"y"), "ỵ": (5,"y"),
+    "o": (0,"o"), "ó": (1,"o"), "ò": (2,"o"), "ỏ": (3,"o"), "õ": (4,"o"), "ọ": (5,"o"),
+    "ô": (0,"ô"), "ố": (1,"ô"), "ồ": (2,"ô"), "ổ": (3,"ô"), "ỗ": (4,"ô"), "ộ": (5,"ô"),
+    "ơ": (0,"ơ"), "ớ": (1,"ơ"), "ờ": (2,"ơ"), "ở": (3,"ơ"), "ỡ": (4,"ơ"), "ợ": (5,"ơ"),
+    "u": (0,"u"), "ú": (1,"u"), "ù": (2,"u"), "ủ": (3,"u"), "ũ": (4,"u"), "ụ": (5,"u"),
+    "ư": (0,"ư"), "ứ": (1,"ư"), "ừ": (2,"ư"), "ử": (3,"ư"), "ữ": (4,"ư"), "ự": (5,"ư"),
+}
+VOWELS_BASE = set(["a","ă","â","e","ê","i","y","o","ô","ơ","u","ư"])
+
+# Phụ âm đầu
+ONSETS = ["ngh","ng","gh","gi","kh","ph","qu","th","tr","ch","nh",
+          "b","c","d","đ","g","h","k","l","m","n","p","q","r","s","t","v","x"]
+
+# Phụ âm cuối
+CODAS  = ["ch","nh","ng","c","m","n","p","t"]
+
+# Âm đệm
+MEDIALS = ["", "o", "u"]
+
+TONES = range(6)
+
+
+# Bản gốc (quét tuần tự ONSETS/CODAS), giữ lại để đối chiếu và benchmark
+def strip_tone_linear(s: str) -> tuple[str, int]:
+    out = []
+    tone_index = 0
+    for ch in s:
+        if ch in TONE_CODE:
+            t, base = TONE_CODE[ch]
+            if tone_index == 0:
+                tone_index = t
+            out.append(base)
+        else:
+            out.append(ch)
+
+    str_without_tone = "".join(out)
+    return str_without_tone, tone_index
+
+
+def split_syllable_linear(syl: str) -> tuple[str, str, str, str, int] | None:
+    s = syl.lower().strip()
+    if not s:
+        return None
+    str_without_tone, tone_index = strip_tone_linear(s)
+
+    # Lấy phụ âm đầu
+    onset = ""
+    for o in ONSETS:
+        if str_without_tone.startswith(o):
+            onset = o
+            break
+    rest = str_without_tone[len(onset) :]
+    if not rest:
+        return None
+
+    # Lấy phụ âm cuối/ âm cuối
+    coda = ""
+    for c in sorted(CODAS, key=len, reverse=True):
+        if rest.endswith(c):
+            coda = c
+            rest = rest[: -len(c)]
+            break
+    if not rest:
+        return None
+
+    # Lấy âm đệm: 'o' hoặc 'u' đứng đầu phần vần (trừ 'qu' xem 'u' thuộc âm đầu)
+    medial = ""
+    if rest and rest[0] in ("o", "u") and not (onset == "qu" and rest[0] == "u"):
+        medial = rest[0]
+        rest = rest[1:]
+    if not rest:
+        return None
+
+    # Lấy âm chính: nguyên âm gốc đầu tiên còn lại
+    nucleus = next((ch for ch in rest if ch in VOWELS_BASE), "")
+    if not nucleus:
+        return None
+
+    return onset, medial, nucleus, coda, tone_index
+
+
+# ----------------------------------------------------------------------------
+# Bộ tách âm tiết dựa trên bảng dựng sẵn: trie phụ âm đầu, trie đảo cho âm cuối,
+# bảng str.translate để bỏ thanh
+# ----------------------------------------------------------------------------
+
+_END = ""  # khóa đánh dấu nút kết thúc trong trie
+
+
+def _build_trie(words, reverse=False):
+    """Trie cho khớp dài nhất; reverse=True để khớp từ cuối chuỗi (âm cuối)"""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in reversed(w) if reverse else w:
+            node = node.setdefault(ch, {})
+        node[_END] = w
+    return trie
+
+
+def _check_longest_first(words):
+    # split_syllable_linear lấy phần tử đầu tiên khớp; trie lấy phần tử dài nhất.
+    # Hai cách chỉ tương đương khi không phần tử nào đứng trước phần mở rộng của nó.
+    for i, w in enumerate(words):
+        for longer in words[i + 1 :]:
+            if len(longer) > len(w) and longer.startswith(w):
+                raise ValueError(f"{w!r} đứng trước {longer!r} trong danh sách")
+
+
+_check_longest_first(ONSETS)
+_ONSET_TRIE = _build_trie(ONSETS)
+_CODA_TRIE = _build_trie(CODAS, reverse=True)
+_MAX_ONSET = max(map(len, ONSETS))
+_MAX_CODA = max(map(len, CODAS))
+_STRIP_TONE_TABLE = str.maketrans({ch: base for ch, (_, base) in TONE_CODE.items()})
+_TONED_RE = re.compile("[" + "".join(ch for ch, (t, _) in TONE_CODE.items() if t) + "]")
+_NUCLEUS_RE = re.compile("[" + "".join(sorted(VOWELS_BASE)) + "]")
+
+
+# Với một âm tiết đứng riêng (vài ký tự), vòng lặp gốc nhanh hơn translate + regex nên
+# strip_tone giữ bản gốc; bảng translate chỉ dùng bên trong split_syllable
+strip_tone = strip_tone_linear
+
+
+def split_syllable(syl: str) -> tuple[str, str, str, str, int] | None:
+    s = syl.lower().strip()
+    if not s:
+        return None
+    m = _TONED_RE.search(s)
+    str_without_tone = s.translate(_STRIP_TONE_TABLE)
+    tone_index = TONE_CODE[m.group()][0] if m else 0
+
+    # Lấy phụ âm đầu: khớp dài nhất trên trie
+    onset = ""
+    node = _ONSET_TRIE
+    for ch in str_without_tone[:_MAX_ONSET]:
+        node = node.get(ch)
+        if node is None:
+            break
+        onset = node.get(_END, onset)
+    rest = str_without_tone[len(onset) :]
+    if not rest:
+        return None
+
+    # Lấy âm cuối: khớp dài nhất trên trie đảo, duyệt từ cuối chuỗi
+    coda = ""
+    node = _CODA_TRIE
+    for ch in reversed(rest[-_MAX_CODA:]):
+        node = node.get(ch)
+        if node is None:
+            break
+        coda = node.get(_END, coda)
+    if coda:
+        rest = rest[: -len(coda)]
+    if not rest:
+        return None
+
+    # Lấy âm đệm: 'o' hoặc 'u' đứng đầu phần vần (trừ 'qu' xem 'u' thuộc âm đầu)
+    medial = ""
+    if rest[0] in ("o", "u") and not (onset == "qu" and rest[0] == "u"):
+        medial = rest[0]
+        rest = rest[1:]
+    if not rest:
+        return None
+
+    # Lấy âm chính: nguyên âm gốc đầu tiên còn lại
+    m = _NUCLEUS_RE.search(rest)
+    if m is None:
+        return None
+
+    return onset, medial, m.group(), coda, tone_index
+
+
+# (thanh, nguyên âm gốc) -> nguyên âm mang dấu thanh
+TONED_VOWEL = {(t, base): ch for ch, (t, base) in TONE_CODE.items()}
+
+
+def iter_possible_syllables(
+    onsets=None, medials=None, nuclei=None, codas=None, tones=None
+):
+    """Sinh các âm tiết khả dĩ theo tổ hợp [Phụ_âm_đầu * Âm_Đệm * Âm_Chính * Âm_Cuối * Thanh_điệu].
+
+    Chỉ giữ các chuỗi mà split_syllable tách lại đúng tổ hợp đã sinh ra nó.
+    """
+    onsets = ["", *ONSETS] if onsets is None else onsets
+    medials = MEDIALS if medials is None else medials
+    nuclei = sorted(VOWELS_BASE) if nuclei is None else nuclei
+    codas = ["", *CODAS] if codas is None else codas
+    tones = TONES if tones is None else tones
+    for parts in product(onsets, medials, nuclei, codas, tones):
+        onset, medial, nucleus, coda, tone = parts
+        syl = onset + medial + TONED_VOWEL[(tone, nucleus)] + coda
+        if split_syllable(syl) == parts:
+            yield syl
+
+
+def load_unique_syllables(csv_path=Path(__file__).parent / "unique_syllables.csv"):
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        return [row[0] for row in csv.reader(f) if row and row[0]]
+
+
+# ----------------------------------------------------------------------------
+# Pipeline một lượt: dòng -> headword -> âm tiết -> thành phần, bộ nhớ O(số âm tiết khác nhau)
+# ----------------------------------------------------------------------------
+
+
+def iter_dictionary_lines(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def iter_headword_stream(lines):
+    for line in lines:
+        head = line.split("\t", 1)[0].strip()
+        if head:
+            yield head
+
+
+def analyse_headwords(headwords, index=None):
+    """Cập nhật tập âm tiết và bộ đếm tần suất trong một lượt.
+
+    split_syllable chỉ chạy một lần cho mỗi âm tiết khác nhau; nếu truyền
+    `index` (SyllableIndex) thì lấy kết quả tách từ chỉ mục trên đĩa.
+    """
+    freq = Counter()
+    n_headwords = 0
+    n_syllables = 0
+    for head in headwords:
+        n_headwords += 1
+        for syl in syllabify(head):
+            n_syllables += 1
+            freq[syl] += 1
+
+    if index is not None:
+        parts_of = {syl: parts for syl, (parts, _) in index.lookup(freq).items()}
+    else:
+        parts_of = {syl: split_syllable(syl) for syl in freq}
+
+    components = {"onset": Counter(), "medial": Counter(), "nucleus": Counter(),
+                  "coda": Counter(), "tone": Counter()}
+    for syl, count in freq.items():
+        parts = parts_of[syl]
+        if parts:
+            for name, value in zip(components, parts):
+                components[name][value] += count
+    return {
+        "headwords": n_headwords,
+        "total_syllables": n_syllables,
+        "frequency": freq,
+        "parts": parts_of,
+        "components": components,
+    }
+
+
+def analyse_dictionary(file_path=DICT_PATH, index=None):
+    return analyse_headwords(iter_headword_stream(iter_dictionary_lines(file_path)), index)
+
+
+def write_unique_syllables(stats, out_csv):
+    with Path(out_csv).open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        for s in sorted(stats["frequency"]):
+            w.writerow([s])
+
+
+def possible_syllable_count(stats):
+    B = 1
+    for counter in stats["components"].values():
+        B *= len(counter)
+    return B
+
+
+def print_report(stats, out_csv):
+    comps = stats["components"]
+    print("Number of headwords", stats["headwords"])
+    print("Number of syllables (with duplicates):", stats["total_syllables"])
+    print("a) Số lượng âm tiết khác nhau trong từ điển: ", len(stats["frequency"]))
+    print("Lưu chi tiết tại:", out_csv)
+
+    print("===============================")
+    print("b) Số lượng âm tiết khả dĩ")
+    print("Số lượng phụ âm đầu:", len(comps["onset"]))
+    print("Số lượng âm đệm:", len(comps["medial"]))
+    print("Số lượng nguyên âm:", len(comps["nucleus"]))
+    print("Số lượng âm cuối:", len(comps["coda"]))
+    print("Số lượng thanh điệu:", len(comps["tone"]))
+    print("Số lượng âm tiết khả dĩ theo tổ hợp [Phụ_âm_đầu * Âm_Đệm * Âm_Chính * Âm_Cuối * Thanh_điệu]", possible_syllable_count(stats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Thống kê âm tiết tiếng Việt từ từ điển")
+    parser.add_argument("dict_path", nargs="?", default=DICT_PATH, help="file từ điển (mặc định VDic_uni.txt)")
+    parser.add_argument("-o", "--output", default="unique_syllables.csv", help="file CSV âm tiết duy nhất")
+    parser.add_argument("--index", help="dùng chỉ mục SQLite (syllable_index.py) để tách âm tiết")
+    args = parser.parse_args()
+
+    if args.index:
+        from syllable_index import SyllableIndex
+
+        with SyllableIndex(args.index) as index:
+            stats = analyse_dictionary(args.dict_path, index)
+    else:
+        stats = analyse_dictionary(args.dict_path)
+    write_unique_syllables(stats, args.output)
+    print_report(stats, Path(args.output))
@@ -0,0 +1,50 @@
+from itertools import product
+
+import pytest
+
+from syllable_space import FIELDS, SyllableSpace
+from syllables import load_unique_syllables
+
+GARBAGE = ["bxxxa", "tqwa", "ngaxyz", "mnbva", "", "xyz"]
+
+
+@pytest.fixture(scope="module")
+def space():
+    return SyllableSpace()
+
+
+@pytest.mark.parametrize(
+    "syllable", ["toán", "Toán", " thuở ", "quạ", "a", "tôi", "người", "yêu", "mai", "tươi", "gìn", "già"]
+)
+def test_is_possible_accepts_real_syllables(space, syllable):
+    assert space.is_possible(syllable)
+
+
+@pytest.mark.parametrize("syllable", GARBAGE)
+def test_is_possible_rejects_garbage(space, syllable):
+    assert not space.is_possible(syllable)
+
+
+def test_every_attested_syllable_is_possible(space):
+    assert all(space.is_possible(s) for s in load_unique_syllables())
+
+
+@pytest.mark.parametrize("syllable", GARBAGE)
+def test_garbage_has_no_code(space, syllable):
+    assert space.code_of(syllable) is None
+    assert len(space.bitset([syllable])) == 0
+
+
+def test_possible_is_exactly_the_round_trip_codes():
+    space = SyllableSpace(
+        onsets=["", "g", "gi", "n", "ng", "ngh", "q", "qu", "t", "th"],
+        nuclei=["a", "i", "ia", "ê", "iê", "u", "ua", "ô", "hi", "x", "à/hoặ"],
+        syllables=[],
+    )
+    expected = set()
+    for idx in product(*(range(len(space.inventory[f])) for f in FIELDS)):
+        code = sum(i << space.shift[f] for f, i in zip(FIELDS, idx))
+        syl = space.compose(code)
+        if syl is not None and space.code_of(syl) == code:
+            expected.add(code)
+    assert set(space.possible) == expected
@@ -1,7 +1,14 @@
+import argparse
+import errno
+import hashlib
+import json
 import os
-import sys
 import shutil
 import re
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from lxml import etree
 
 NS = {
@@ -36,13 +43,137 @@ def discover_parts(parent_dir):
     return parts
 
 
-def copy_parts_as_is(parts, out_root):
-    for idx, p in enumerate(parts, start=1):
-        dst = os.path.join(out_root, "parts", f"part_{idx:02d}")
-        print(f"Copy {p['dir']} → {dst}")
-        if os.path.exists(dst):
-            shutil.rmtree(dst)
-        shutil.copytree(p["dir"], dst)
+MANIFEST_NAME = "merge_manifest.json"
+MANIFEST_VERSION = 3
+FICLONE = 0x40049409  # ioctl reflink của Linux (btrfs, xfs...)
+# Lỗi cho biết filesystem không hỗ trợ link/reflink giữa nguồn và đích -> copy
+_LINK_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EMLINK}
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _unchanged(src, dst, check):
+    """dst đã giống src từ lần merge trước (cùng size + mtime, hoặc cùng hash)"""
+    try:
+        d = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    s = os.stat(src)
+    if (s.st_dev, s.st_ino) == (d.st_dev, d.st_ino):
+        return True  # hardlink tới chính file nguồn
+    if s.st_size != d.st_size:
+        return False
+    if check == "hash":
+        return _sha256(src) == _sha256(dst)
+    return s.st_mtime_ns == d.st_mtime_ns
+
+
+def _reflink(src, dst):
+    import fcntl
+
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def _place_file(src, dst, mode):
+    """Đưa src tới dst: reflink/hardlink nếu được, không thì copy. Trả về cách đã dùng."""
+    if os.path.lexists(dst):
+        os.unlink(dst)  # không ghi đè vào file có thể đang là hardlink của nguồn cũ
+    methods = {"auto": [("reflink", _reflink)], "link": [("link", os.link)], "copy": []}[mode]
+    for name, func in methods:
+        try:
+            func(src, dst)
+            return name
+        except OSError as e:
+            if e.errno not in _LINK_UNSUPPORTED:
+                raise
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def copy_parts_as_is(parts, out_root, mode="auto", workers=None, check="mtime", only=None):
+    """Đồng bộ từng phần vào out_root/parts/part_NN.
+
+    mode: "auto" (reflink, không được thì copy), "link" (hardlink, không được thì
+    copy; file đích dùng chung inode với nguồn nên không được sửa tại chỗ) hoặc
+    "copy". File đã có ở đích với cùng size + mtime (check="hash": cùng sha256)
+    được bỏ qua, file thừa ở đích bị xóa. Các file được copy song song bằng
+    thread pool. `only`: chỉ đồng bộ các phần có số thứ tự trong tập này.
+    Trả về thống kê của từng phần.
+    """
+    workers = workers or min(8, (os.cpu_count() or 1) * 2)
+    stats = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for idx, p in enumerate(parts, start=1):
+            if only is not None and idx not in only:
+                continue
+            start = time.perf_counter()
+            # Đường dẫn chuẩn hóa: `wanted` và lượt dọn file thừa phải so khớp cùng một dạng
+            dst_root = os.path.abspath(os.path.join(out_root, "parts", f"part_{idx:02d}"))
+            if os.path.isfile(dst_root):
+                os.unlink(dst_root)
+            print(f"Copy {p['dir']} → {dst_root}")
+
+            jobs, wanted = [], set()
+            for dirpath, dirnames, filenames in os.walk(p["dir"]):
+                rel = os.path.relpath(dirpath, p["dir"])
+                dst_dir = os.path.normpath(os.path.join(dst_root, rel))
+                if os.path.lexists(dst_dir) and not os.path.isdir(dst_dir):
+                    os.unlink(dst_dir)
+                os.makedirs(dst_dir, exist_ok=True)
+                wanted.add(dst_dir)
+                for name in filenames:
+                    src, dst = os.path.join(dirpath, name), os.path.join(dst_dir, name)
+                    wanted.add(dst)
+                    jobs.append((src, dst))
+
+            # Xóa file/thư mục không còn trong nguồn
+            for dirpath, dirnames, filenames in os.walk(dst_root, topdown=False):
+                for name in filenames + dirnames:
+                    path = os.path.join(dirpath, name)
+                    if path in wanted:
+                        continue
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.unlink(path)
+
+            def place(job):
+                src, dst = job
+                if _unchanged(src, dst, check):
+                    return "skip", 0
+                return _place_file(src, dst, mode), os.path.getsize(src)
+
+            part = {"part": idx, "files": len(jobs), "bytes": 0}
+            for method, size in pool.map(place, jobs):
+                part[method] = part.get(method, 0) + 1
+                if method == "copy":
+                    part["bytes"] += size
+            part["seconds"] = time.perf_counter() - start
+            stats.append(part)
+
+    print("Phần   file  copy  link  reflink  bỏ qua   MB copy   giây")
+    for part in stats:
+        print(
+            f"{part['part']:>4} {part['files']:>6} {part.get('copy', 0):>5} {part.get('link', 0):>5}"
+            f" {part.get('reflink', 0):>8} {part.get('skip', 0):>7} {part['bytes'] / 1e6:>9.1f}"
+            f" {part['seconds']:>6.2f}"
+        )
+    total = sum(part["bytes"] for part in stats)
+    print(f"Tổng: {total / 1e6:.1f} MB copy, {sum(part['seconds'] for part in stats):.2f} giây")
+    return stats
 
 
 def read_part_opf_info(part_dir, opf_path):
@@ -78,17 +209,534 @@ def read_part_opf_info(part_dir, opf_path):
     }
 
 
-def build_merged_ncx(parts, out_root):
+def part_fingerprint(part_dir, check="mtime"):
+    """Hash nội dung một phần: đường dẫn + size + mtime của mọi file (check="hash": + sha256)"""
+    h = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(part_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            stamp = _sha256(path) if check == "hash" else st.st_mtime_ns
+            h.update(f"{os.path.relpath(path, part_dir)}\0{st.st_size}\0{stamp}\n".encode())
+    return h.hexdigest()
+
+
+class ManifestItem:
+    __slots__ = ("id", "href", "media_type", "fallback", "properties")
+
+    def __init__(self, id, href, media_type="", fallback=None, properties=None):
+        self.id = id
+        self.href = href
+        self.media_type = media_type
+        self.fallback = fallback
+        self.properties = properties
+
+
+class SpineRef:
+    __slots__ = ("idref", "linear")
+
+    def __init__(self, idref, linear=None):
+        self.idref = idref
+        self.linear = linear
+
+
+class NavPoint:
+    """navPoint của NCX; labels là [(text, thuộc tính audio hoặc None)], play là playOrder gốc"""
+
+    __slots__ = ("id", "cls", "labels", "src", "play", "children")
+
+    def __init__(self, id, cls, labels, src, play, children):
+        self.id = id
+        self.cls = cls
+        self.labels = labels
+        self.src = src
+        self.play = play
+        self.children = children
+
+
+class PageTarget:
+    """pageTarget trong pageList của NCX"""
+
+    __slots__ = ("id", "type", "value", "cls", "labels", "src", "play")
+
+    def __init__(self, id, type, value, cls, labels, src, play):
+        self.id = id
+        self.type = type
+        self.value = value
+        self.cls = cls
+        self.labels = labels
+        self.src = src
+        self.play = play
+
+
+class PartModel:
+    """Nội dung OPF/NCX của một phần cần cho việc ghép, đọc một lần từ file"""
+
+    __slots__ = (
+        "kind",
+        "unique_identifier",
+        "metadata",
+        "items",
+        "spine",
+        "nav_points",
+        "page_targets",
+        "total_page_count",
+        "max_page_number",
+    )
+
+    def __init__(
+        self,
+        kind,
+        unique_identifier,
+        metadata,
+        items,
+        spine,
+        nav_points,
+        page_targets=(),
+        total_page_count=0,
+        max_page_number=0,
+    ):
+        self.kind = kind
+        self.unique_identifier = unique_identifier
+        self.metadata = metadata  # chuỗi XML của <metadata> hoặc None
+        self.items = items
+        self.spine = spine
+        self.nav_points = nav_points  # None nếu NCX không có navMap
+        self.page_targets = page_targets
+        self.total_page_count = total_page_count
+        self.max_page_number = max_page_number
+
+    def play_orders(self):
+        """playOrder gốc của mọi navPoint và pageTarget"""
+        stack = list(self.nav_points or ())
+        while stack:
+            nav = stack.pop()
+            stack.extend(nav.children)
+            if nav.play is not None:
+                yield nav.play
+        for target in self.page_targets:
+            if target.play is not None:
+                yield target.play
+
+    def nav_depth(self):
+        """Số cấp navPoint lồng nhau sâu nhất (0 nếu không có navPoint)"""
+        depth, level = 0, list(self.nav_points or ())
+        while level:
+            depth += 1
+            level = [child for nav in level for child in nav.children]
+        return depth
+
+    def to_json(self):
+        def nav(n):
+            return [n.id, n.cls, n.labels, n.src, n.play, [nav(c) for c in n.children]]
+
+        return {
+            "kind": self.kind,
+            "unique_identifier": self.unique_identifier,
+            "metadata": self.metadata,
+            "items": [[i.id, i.href, i.media_type, i.fallback, i.properties] for i in self.items],
+            "spine": [[r.idref, r.linear] for r in self.spine],
+            "nav_points": None if self.nav_points is None else [nav(n) for n in self.nav_points],
+            "page_targets": [
+                [t.id, t.type, t.value, t.cls, t.labels, t.src, t.play] for t in self.page_targets
+            ],
+            "total_page_count": self.total_page_count,
+            "max_page_number": self.max_page_number,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        def labels(items):
+            return [tuple(l) for l in items]
+
+        def nav(n):
+            id, klass, label_items, src, play, children = n
+            return NavPoint(id, klass, labels(label_items), src, play, [nav(c) for c in children])
+
+        nav_points = data["nav_points"]
+        return cls(
+            data["kind"],
+            data["unique_identifier"],
+            data["metadata"],
+            [ManifestItem(*i) for i in data["items"]],
+            [SpineRef(*r) for r in data["spine"]],
+            None if nav_points is None else [nav(n) for n in nav_points],
+            [
+                PageTarget(id, type, value, klass, labels(label_items), src, play)
+                for id, type, value, klass, label_items, src, play in data["page_targets"]
+            ],
+            data["total_page_count"],
+            data["max_page_number"],
+        )
+
+
+def _play_order(el):
+    value = (el.get("playOrder") or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def _read_labels(el):
+    ncx = f"{{{NS['ncx']}}}"
+    labels = []
+    for label in el.iterchildren(f"{ncx}navLabel"):
+        audio = label.find(f"{ncx}audio")
+        labels.append((label.findtext(f"{ncx}text"), dict(audio.attrib) if audio is not None else None))
+    return labels
+
+
+def _content_src(el):
+    content = el.find(f"{{{NS['ncx']}}}content")
+    return content.get("src") if content is not None else None
+
+
+def _read_nav_point(el):
+    return NavPoint(
+        el.get("id"),
+        el.get("class"),
+        _read_labels(el),
+        _content_src(el),
+        _play_order(el),
+        [_read_nav_point(child) for child in el.iterchildren(f"{{{NS['ncx']}}}navPoint")],
+    )
+
+
+def _read_page_target(el):
+    return PageTarget(
+        el.get("id"),
+        el.get("type"),
+        el.get("value"),
+        el.get("class"),
+        _read_labels(el),
+        _content_src(el),
+        _play_order(el),
+    )
+
+
+def _page_totals(head_meta, page_count, max_value):
+    """(dtb:totalPageCount, dtb:maxPageNumber) của một phần: lấy từ head của NCX, thiếu
+    hoặc sai thì tính từ pageList (số pageTarget, value lớn nhất)"""
+    totals = []
+    for name, fallback in (("dtb:totalPageCount", page_count), ("dtb:maxPageNumber", max_value)):
+        value = (head_meta.get(name) or "").strip()
+        totals.append(int(value) if value.isdigit() else fallback)
+    return tuple(totals)
+
+
+def _read_manifest_item(el):
+    """ManifestItem của một <item>, None nếu thiếu id/href hoặc là NCX của phần"""
+    href = el.get("href")
+    iid = el.get("id")
+    mt = el.get("media-type", "")
+    if not href or not iid or mt == "application/x-dtbncx+xml":
+        return None
+    return ManifestItem(iid, href, mt, el.get("fallback"), el.get("properties"))
+
+
+def load_part_model(part):
+    """Đọc OPF và NCX của một phần (mỗi file một lần) thành PartModel"""
+    info = read_part_opf_info(os.path.dirname(part["opf"]), part["opf"])
+    items = [
+        item
+        for item in map(_read_manifest_item, info["manifest"].iterchildren(info["item_tag"]))
+        if item is not None
+    ]
+    spine = [
+        SpineRef(ir.get("idref"), ir.get("linear"))
+        for ir in info["spine"].iterchildren(info["itemref_tag"])
+        if ir.get("idref")
+    ]
+
+    ncx = f"{{{NS['ncx']}}}"
+    ncx_root = parse_xml(part["ncx"]).getroot()
+    nav_map = ncx_root.find(f"{ncx}navMap")
+    nav_points = None
+    if nav_map is not None:
+        nav_points = [_read_nav_point(el) for el in nav_map.iterchildren(f"{ncx}navPoint")]
+    page_targets = [_read_page_target(el) for el in ncx_root.iterfind(f"{ncx}pageList/{ncx}pageTarget")]
+    head_meta = {m.get("name"): m.get("content") for m in ncx_root.iterfind(f"{ncx}head/{ncx}meta")}
+    values = [int(t.value) for t in page_targets if t.value and t.value.isdigit()]
+    return PartModel(
+        info["kind"],
+        info["root"].get("unique-identifier", "uid"),
+        etree.tostring(info["metadata"], encoding="unicode", with_tail=False)
+        if info["metadata"] is not None
+        else None,
+        items,
+        spine,
+        nav_points,
+        page_targets,
+        *_page_totals(head_meta, len(page_targets), max(values, default=0)),
+    )
+
+
+def _discard(el):
+    """Xóa phần tử iterparse đã đọc xong cùng các anh em phía trước để cây không lớn dần"""
+    el.clear()
+    parent = el.getparent()
+    while el.getprevious() is not None:
+        del parent[0]
+
+
+def iter_part_ncx(ncx_path):
+    """Đọc dần NCX của một phần: ("navMap", None) khi gặp navMap, rồi ("navPoint", NavPoint)
+    cho từng navPoint cấp cao nhất; chỉ giữ trong bộ nhớ navPoint đang đọc"""
+    nav_map_tag = f"{{{NS['ncx']}}}navMap"
+    depth = 0  # số navPoint đang mở
+    for event, el in etree.iterparse(
+        ncx_path,
+        events=("start", "end"),
+        tag=(nav_map_tag, f"{{{NS['ncx']}}}navPoint"),
+        recover=True,
+    ):
+        if el.tag == nav_map_tag:
+            if event == "end":
+                return  # phần còn lại (pageList) đọc bằng iter_part_page_targets
+            yield "navMap", None
+        elif event == "start":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:  # navPoint con được đọc cùng navPoint cấp cao nhất chứa nó
+                yield "navPoint", _read_nav_point(el)
+                _discard(el)
+
+
+def iter_part_page_targets(ncx_path):
+    """Đọc dần các pageTarget trong pageList của NCX một phần"""
+    ncx = f"{{{NS['ncx']}}}"
+    for _, el in etree.iterparse(
+        ncx_path, events=("end",), tag=(f"{ncx}navMap", f"{ncx}pageTarget"), recover=True
+    ):
+        if el.tag == f"{ncx}pageTarget":
+            yield _read_page_target(el)
+        _discard(el)
+
+
+def scan_part_ncx(ncx_path):
+    """Lượt đọc nhanh NCX một phần (chỉ thuộc tính), dùng trước khi ghi dần: có navMap
+    không, số cấp navPoint, số trang và các playOrder gốc (mảng số nguyên đã sắp xếp,
+    không trùng)"""
+    ncx = f"{{{NS['ncx']}}}"
+    head_meta, plays = {}, set()
+    nav_map, page_count, max_value = False, 0, 0
+    depth = nav_depth = 0  # số navPoint đang mở, số cấp sâu nhất
+    for event, el in etree.iterparse(
+        ncx_path,
+        events=("start", "end"),
+        tag=(f"{ncx}meta", f"{ncx}navMap", f"{ncx}navPoint", f"{ncx}pageTarget"),
+        recover=True,
+    ):
+        if event == "start":
+            if el.tag == f"{ncx}navPoint":
+                depth += 1
+                nav_depth = max(nav_depth, depth)
+            continue
+        if el.tag == f"{ncx}meta":
+            head_meta[el.get("name")] = el.get("content")
+        elif el.tag == f"{ncx}navMap":
+            nav_map = True
+        else:
+            if el.tag == f"{ncx}navPoint":
+                depth -= 1
+            play = _play_order(el)
+            if play is not None:
+                plays.add(play)
+            if el.tag == f"{ncx}pageTarget":
+                page_count += 1
+                value = el.get("value") or ""
+                if value.isdigit():
+                    max_value = max(max_value, int(value))
+        _discard(el)
+    total_page_count, max_page_number = _page_totals(head_meta, page_count, max_value)
+    return {
+        "nav_map": nav_map,
+        "nav_depth": nav_depth,
+        "page_targets": page_count,
+        "total_page_count": total_page_count,
+        "max_page_number": max_page_number,
+        "play_orders": array("q", sorted(plays)),
+    }
+
+
+def iter_part_opf(opf_path):
+    """Đọc dần OPF của một phần: ("package", (kind, unique-identifier)), rồi ("metadata", phần tử),
+    ("item", ManifestItem), ("itemref", SpineRef) theo thứ tự trong file"""
+    root = None
+    seen = set()
+    for event, el in etree.iterparse(opf_path, events=("start", "end"), recover=True):
+        if root is None:
+            root = el
+            kind = "oeb" if (el.nsmap.get(None) or "") == NS["oeb"] else "opf"
+            pkg = f"{{{NS[kind]}}}"
+            yield "package", (kind, el.get("unique-identifier", "uid"))
+            continue
+        parent = el.getparent()
+        if event == "start" or parent is None:
+            continue
+        if parent is root:
+            seen.add(el.tag)
+            if el.tag == f"{pkg}metadata":
+                yield "metadata", el
+            _discard(el)
+        elif parent.getparent() is root and parent.tag in (f"{pkg}manifest", f"{pkg}spine"):
+            if el.tag == f"{pkg}item":
+                item = _read_manifest_item(el)
+                if item is not None:
+                    yield "item", item
+            elif el.tag == f"{pkg}itemref" and el.get("idref"):
+                yield "itemref", SpineRef(el.get("idref"), el.get("linear"))
+            _discard(el)
+    if root is None or not {f"{pkg}manifest", f"{pkg}spine"} <= seen:
+        raise ValueError(f"OPF thiếu manifest/spine: {opf_path}")
+
+
+def _prefixed_src(pref, src):
+    base, frag = (src.split("#", 1) + [""])[:2]
+    return pref + base + (("#" + frag) if frag else "")
+
+
+def merged_ncx_meta(total_page_count=0, max_page_number=0, depth=1):
+    """depth: số cấp navPoint của NCX đã ghép, tính cả navPoint bọc từng phần"""
+    return [
+        ("dtb:uid", "uid-merged"),
+        ("dtb:depth", str(depth)),
+        ("dtb:totalPageCount", str(total_page_count)),
+        ("dtb:maxPageNumber", str(max_page_number)),
+    ]
+
+
+OEB_DOCTYPE = '<!DOCTYPE package PUBLIC "+//ISBN 0-9673008-1-9//DTD OEB 1.2 Package//EN" "http://openebook.org/dtds/oeb-1.2/oebpkg12.dtd">'
+INDENT = "  "
+
+
+class PlayOrder:
+    """Đánh lại playOrder của một phần: các giá trị gốc (của navPoint và pageTarget, theo
+    thứ tự tăng dần, trùng nhau thì chung số) thành start, start + 1, ...; mục không có
+    playOrder dùng lại số của mục đứng trước"""
+
+    __slots__ = ("start", "values", "last")
+
+    def __init__(self, start, values):
+        self.start = start
+        self.values = values if isinstance(values, array) else array("q", sorted(set(values)))
+        self.last = start - 1
+
+    @property
+    def end(self):
+        """playOrder đầu tiên sau phần này"""
+        return self.start + len(self.values)
+
+    def __call__(self, play):
+        if play is not None:
+            k = bisect_left(self.values, play)
+            if k < len(self.values) and self.values[k] == play:
+                self.last = self.start + k
+        return self.last
+
+
+def _add_part_nav_point(parent, idx, play):
+    """navPoint "Phần NN" bao các navPoint của phần idx (chưa có con)"""
+    ncx_namespace = NS["ncx"]
+    el = etree.SubElement(parent, f"{{{ncx_namespace}}}navPoint")
+    el.set("id", f"part_{idx:02d}")
+    el.set("playOrder", str(play))
+    label = etree.SubElement(el, f"{{{ncx_namespace}}}navLabel")
+    etree.SubElement(label, f"{{{ncx_namespace}}}text").text = f"Phần {idx:02d}"
+    etree.SubElement(el, f"{{{ncx_namespace}}}content").set(
+        "src", f"parts/part_{idx:02d}/book.opf"
+    )
+    return el
+
+
+def _add_labels_and_content(el, record, pref):
+    ncx_namespace = NS["ncx"]
+    for text, audio in record.labels:
+        label = etree.SubElement(el, f"{{{ncx_namespace}}}navLabel")
+        etree.SubElement(label, f"{{{ncx_namespace}}}text").text = text
+        if audio is not None:
+            audio = dict(audio)
+            if audio.get("src"):
+                audio["src"] = pref + audio["src"]
+            etree.SubElement(label, f"{{{ncx_namespace}}}audio", audio)
+    if record.src is not None:
+        etree.SubElement(el, f"{{{ncx_namespace}}}content").set(
+            "src", _prefixed_src(pref, record.src) if record.src else record.src
+        )
+
+
+def _add_nav_point(parent, nav, idx, renumber):
+    """Thêm navPoint (và các con) của phần idx dưới parent; renumber: PlayOrder của phần"""
+    el = etree.SubElement(parent, f"{{{NS['ncx']}}}navPoint")
+    if nav.id:
+        el.set("id", f"p{idx}_{nav.id}")
+    if nav.cls:
+        el.set("class", nav.cls)
+    el.set("playOrder", str(renumber(nav.play)))
+    _add_labels_and_content(el, nav, f"parts/part_{idx:02d}/")
+    for child in nav.children:
+        _add_nav_point(el, child, idx, renumber)
+    return el
+
+
+def _add_page_target(parent, target, idx, renumber):
+    el = etree.SubElement(parent, f"{{{NS['ncx']}}}pageTarget")
+    if target.id:
+        el.set("id", f"p{idx}_{target.id}")
+    for name, value in (("type", target.type), ("value", target.value), ("class", target.cls)):
+        if value:
+            el.set(name, value)
+    el.set("playOrder", str(renumber(target.play)))
+    _add_labels_and_content(el, target, f"parts/part_{idx:02d}/")
+    return el
+
+
+def _add_manifest_item(manifest, pkg_ns, it, idx):
+    new_it = etree.SubElement(manifest, f"{{{pkg_ns}}}item")
+    new_it.set("id", f"p{idx}_{it.id}")
+    new_it.set("href", f"parts/part_{idx:02d}/" + it.href.replace("\\", "/"))
+    if it.media_type:
+        new_it.set("media-type", it.media_type)
+    if it.fallback:
+        new_it.set("fallback", it.fallback)
+    if it.properties:
+        new_it.set("properties", it.properties)
+    return new_it
+
+
+def _add_itemref(spine, pkg_ns, ref, idx):
+    itemref = etree.SubElement(spine, f"{{{pkg_ns}}}itemref")
+    itemref.set("idref", f"p{idx}_{ref.idref}")
+    if ref.linear:
+        itemref.set("linear", ref.linear)
+    return itemref
+
+
+def _set_total_time(metadata, pkg_ns, kind, total_time):
+    """Đặt dtb:totalTime trong metadata (OEB: trong x-metadata) thành thời lượng cả sách"""
+    for meta in metadata.iter(f"{{{pkg_ns}}}meta"):
+        if meta.get("name") == "dtb:totalTime":
+            meta.set("content", total_time)
+            return
+    parent = metadata
+    if kind == "oeb":
+        parent = metadata.find(f"{{{pkg_ns}}}x-metadata")
+        if parent is None:
+            parent = etree.SubElement(metadata, f"{{{pkg_ns}}}x-metadata")
+    etree.SubElement(parent, f"{{{pkg_ns}}}meta", name="dtb:totalTime", content=total_time)
+
+
+def build_merged_ncx(models, out_root):
     ncx_namespace = NS["ncx"]
     ncx = etree.Element(f"{{{ncx_namespace}}}ncx", nsmap={"ncx": NS["ncx"]})
     ncx.set("version", "2005-1")
     head = etree.SubElement(ncx, f"{{{ncx_namespace}}}head")
-    for name, content in [
-        ("dtb:uid", "uid-merged"),
-        ("dtb:depth", "2"),
-        ("dtb:totalPageCount", "0"),
-        ("dtb:maxPageNumber", "0"),
-    ]:
+    total_page_count = sum(model.total_page_count for model in models)
+    max_page_number = max(model.max_page_number for model in models)
+    depth = max(
+        (1 + model.nav_depth() for model in models if model.nav_points is not None), default=0
+    )
+    for name, content in merged_ncx_meta(total_page_count, max_page_number, depth):
         m = etree.SubElement(head, f"{{{ncx_namespace}}}meta")
         m.set("name", name)
         m.set("content", content)
@@ -97,38 +745,24 @@ def build_merged_ncx(parts, out_root):
 
     navMap = etree.SubElement(ncx, f"{{{ncx_namespace}}}navMap")
     play = 1
+    renumbers = []
+    for idx, model in enumerate(models, start=1):
+        parent = None
+        if model.nav_points is not None:
+            parent = _add_part_nav_point(navMap, idx, play)
+            play += 1
+        renumber = PlayOrder(play, model.play_orders())
+        renumbers.append(renumber)
+        play = renumber.end
+        for nav in model.nav_points or ():
+            _add_nav_point(parent, nav, idx, renumber)
 
-    for idx, p in enumerate(parts, start=1):
-        pref = f"parts/part_{idx:02d}/"
-        src_ncx = parse_xml(p["ncx"]).getroot()
-        part_nav = src_ncx.find(f"{{{ncx_namespace}}}navMap")
-        if part_nav is None:
-            continue
-
-        parent = etree.SubElement(navMap, f"{{{ncx_namespace}}}navPoint")
-        parent.set("id", f"part_{idx:02d}")
-        parent.set("playOrder", str(play))
-        play += 1
-        label = etree.SubElement(parent, f"{{{ncx_namespace}}}navLabel")
-        etree.SubElement(label, f"{{{ncx_namespace}}}text").text = f"Phần {idx:02d}"
-        etree.SubElement(parent, f"{{{ncx_namespace}}}content").set(
-            "src", pref + os.path.basename(p["opf"])
-        )
-
-        for child in part_nav.findall(f".//{{{ncx_namespace}}}navPoint"):
-            new_child = etree.fromstring(etree.tostring(child))
-            for e in new_child.iter():
-                if e.tag.endswith("navPoint") and e.get("id"):
-                    e.set("id", f"p{idx}_{e.get('id')}")
-                if e.tag.endswith("content") and e.get("src"):
-                    src = e.get("src")
-                    base, frag = (src.split("#", 1) + [""])[:2]
-                    e.set("src", pref + base + (("#" + frag) if frag else ""))
-            for e in new_child.iter():
-                if e.tag.endswith("navPoint"):
-                    e.set("playOrder", str(play))
-                    play += 1
-            parent.append(new_child)
+    # pageList: số trang của các phần, playOrder chung dãy với navMap
+    if any(model.page_targets for model in models):
+        page_list = etree.SubElement(ncx, f"{{{ncx_namespace}}}pageList")
+        for idx, (model, renumber) in enumerate(zip(models, renumbers), start=1):
+            for target in model.page_targets:
+                _add_page_target(page_list, target, idx, renumber)
 
     out_path = os.path.join(out_root, "navigation.ncx")
     etree.ElementTree(ncx).write(
@@ -137,19 +771,21 @@ def build_merged_ncx(parts, out_root):
     return out_path
 
 
-def build_merged_opf(parts, out_root):
-    first_info = read_part_opf_info(os.path.dirname(parts[0]["opf"]), parts[0]["opf"])
-    kind = first_info["kind"]
+def build_merged_opf(models, out_root, total_time=None):
+    first = models[0]
+    kind = first.kind
     pkg_ns = NS["oeb"] if kind == "oeb" else NS["opf"]
 
     package = etree.Element(f"{{{pkg_ns}}}package", nsmap={None: pkg_ns})
-    package.set("unique-identifier", first_info["root"].get("unique-identifier", "uid"))
+    package.set("unique-identifier", first.unique_identifier)
 
     # Copy metadata from the first part
     metadata = etree.SubElement(package, f"{{{pkg_ns}}}metadata")
-    if first_info["metadata"] is not None:
-        for el in first_info["metadata"]:
+    if first.metadata is not None:
+        for el in etree.fromstring(first.metadata):
             metadata.append(el)
+    if total_time is not None:
+        _set_total_time(metadata, pkg_ns, kind, total_time)
 
     # manifest + spine
     manifest = etree.SubElement(package, f"{{{pkg_ns}}}manifest")
@@ -164,34 +800,11 @@ def build_merged_opf(parts, out_root):
     spine.set("toc", ncx_id)
 
     # Combine manifests and spines from all parts
-    for idx, p in enumerate(parts, start=1):
-        pref = f"parts/part_{idx:02d}/"
-        info = read_part_opf_info(os.path.dirname(p["opf"]), p["opf"])
-        # manifest
-        for it in info["manifest"].findall(info["item_tag"]):
-            href = it.get("href")
-            iid = it.get("id")
-            mt = it.get("media-type", "")
-            if not href or not iid:
-                continue
-            if mt == "application/x-dtbncx+xml":
-                continue
-            new_it = etree.SubElement(manifest, f"{{{pkg_ns}}}item")
-            new_it.set("id", f"p{idx}_{iid}")
-            new_it.set("href", pref + href.replace("\\", "/"))
-            if mt:
-                new_it.set("media-type", mt)
-            for extra in ("fallback", "properties"):
-                if it.get(extra):
-                    new_it.set(extra, it.get(extra))
-        # spine
-        for ir in info["spine"].findall(info["itemref_tag"]):
-            idref = ir.get("idref")
-            if not idref:
-                continue
-            etree.SubElement(spine, f"{{{pkg_ns}}}itemref").set(
-                "idref", f"p{idx}_{idref}"
-            )
+    for idx, model in enumerate(models, start=1):
+        for it in model.items:
+            _add_manifest_item(manifest, pkg_ns, it, idx)
+        for ref in model.spine:
+            _add_itemref(spine, pkg_ns, ref, idx)
 
     # Save OPF
     out_opf = os.path.join(out_root, "book.opf")
@@ -200,10 +813,9 @@ def build_merged_opf(parts, out_root):
     )
 
     if kind == "oeb":
-        doctype = '<!DOCTYPE package PUBLIC "+//ISBN 0-9673008-1-9//DTD OEB 1.2 Package//EN" "http://openebook.org/dtds/oeb-1.2/oebpkg12.dtd">\n'
         with open(out_opf, "wb") as f:
             head, body = xml.split(b"\n", 1) if b"\n" in xml else (xml, b"")
-            f.write(head + b"\n" + doctype.encode("utf-8") + body)
+            f.write(head + b"\n" + OEB_DOCTYPE.encode("utf-8") + b"\n" + body)
     else:
         with open(out_opf, "wb") as f:
             f.write(xml)
@@ -211,10 +823,386 @@ def build_merged_opf(parts, out_root):
     return out_opf
 
 
+def _write_element(xf, el, depth, nsmap):
+    """Ghi el (thụt lề theo depth) bằng xf.element để namespace đã khai báo ở phần tử
+    cha không bị khai báo lại; bỏ khoảng trắng có sẵn giữa các phần tử con"""
+    xf.write("\n" + INDENT * depth)
+    # xf.element không thấy namespace của phần tử cha khi được truyền nsmap: chỉ truyền
+    # (đầy đủ) khi el khai báo thêm namespace mới
+    declared = any(nsmap.get(k) != v for k, v in el.nsmap.items())
+    with xf.element(el.tag, dict(el.attrib), nsmap=el.nsmap if declared else None):
+        children = [child for child in el if isinstance(child.tag, str)]
+        if el.text and (not children or el.text.strip()):
+            xf.write(el.text)
+        for child in children:
+            _write_element(xf, child, depth + 1, el.nsmap)
+        if children:
+            xf.write("\n" + INDENT * depth)
+
+
+def stream_merged_ncx(parts, out_root):
+    """Như build_merged_ncx nhưng đọc NCX từng phần bằng iterparse và ghi dần bằng
+    etree.xmlfile: ngoài mảng playOrder của các phần, bộ nhớ chỉ phụ thuộc navPoint lớn
+    nhất, không phụ thuộc cả sách"""
+    ncx_namespace = NS["ncx"]
+    # Số trang phải có trước khi ghi head, playOrder mới phải biết trước khi ghi navMap
+    scans = [scan_part_ncx(part["ncx"]) for part in parts]
+    nsmap = {"ncx": ncx_namespace}
+    out_path = os.path.join(out_root, "navigation.ncx")
+    with open(out_path, "wb") as f:
+        with etree.xmlfile(f, encoding="utf-8") as xf:
+            xf.write_declaration()
+            with xf.element(f"{{{ncx_namespace}}}ncx", {"version": "2005-1"}, nsmap=nsmap):
+                ncx = etree.Element(f"{{{ncx_namespace}}}ncx", nsmap=nsmap)
+                head = etree.SubElement(ncx, f"{{{ncx_namespace}}}head")
+                for name, content in merged_ncx_meta(
+                    sum(scan["total_page_count"] for scan in scans),
+                    max(scan["max_page_number"] for scan in scans),
+                    max((1 + scan["nav_depth"] for scan in scans if scan["nav_map"]), default=0),
+                ):
+                    etree.SubElement(head, f"{{{ncx_namespace}}}meta", name=name, content=content)
+                docTitle = etree.SubElement(ncx, f"{{{ncx_namespace}}}docTitle")
+                etree.SubElement(docTitle, f"{{{ncx_namespace}}}text").text = "Merged"
+                for el in ncx:
+                    _write_element(xf, el, 1, nsmap)
+
+                xf.write("\n" + INDENT)
+                with xf.element(f"{{{ncx_namespace}}}navMap"):
+                    play = 1
+                    renumbers = []
+                    for idx, (part, scan) in enumerate(zip(parts, scans), start=1):
+                        header = None
+                        if scan["nav_map"]:
+                            header = _add_part_nav_point(ncx, idx, play)
+                            play += 1
+                        renumber = PlayOrder(play, scan["play_orders"])
+                        renumbers.append(renumber)
+                        play = renumber.end
+                        if header is None:  # phần không có navMap
+                            continue
+                        xf.write("\n" + INDENT * 2)
+                        with xf.element(header.tag, dict(header.attrib)):
+                            for el in header:
+                                _write_element(xf, el, 3, nsmap)
+                            for kind, nav in iter_part_ncx(part["ncx"]):
+                                if kind == "navPoint":
+                                    holder = etree.Element(header.tag, nsmap=nsmap)
+                                    _add_nav_point(holder, nav, idx, renumber)
+                                    _write_element(xf, holder[0], 3, nsmap)
+                            xf.write("\n" + INDENT * 2)
+                        ncx.remove(header)
+                    xf.write("\n" + INDENT)
+
+                if any(scan["page_targets"] for scan in scans):
+                    xf.write("\n" + INDENT)
+                    with xf.element(f"{{{ncx_namespace}}}pageList"):
+                        for idx, (part, scan) in enumerate(zip(parts, scans), start=1):
+                            if not scan["page_targets"]:
+                                continue
+                            for target in iter_part_page_targets(part["ncx"]):
+                                holder = etree.Element(f"{{{ncx_namespace}}}pageList", nsmap=nsmap)
+                                _add_page_target(holder, target, idx, renumbers[idx - 1])
+                                _write_element(xf, holder[0], 2, nsmap)
+                        xf.write("\n" + INDENT)
+                xf.write("\n")
+        f.write(b"\n")
+    return out_path
+
+
+def stream_merged_opf(parts, out_root, total_time=None):
+    """Như build_merged_opf nhưng đọc OPF từng phần bằng iterparse (manifest rồi spine,
+    mỗi lượt đọc lại file) và ghi dần bằng etree.xmlfile"""
+    events = iter_part_opf(parts[0]["opf"])
+    _, (kind, unique_identifier) = next(events)
+    metadata = next((el for name, el in events if name == "metadata"), None)
+    pkg_ns = NS["oeb"] if kind == "oeb" else NS["opf"]
+    nsmap = {None: pkg_ns}
+
+    out_opf = os.path.join(out_root, "book.opf")
+    with open(out_opf, "wb") as f:
+        with etree.xmlfile(f, encoding="utf-8") as xf:
+            xf.write_declaration()
+            if kind == "oeb":
+                xf.write_doctype(OEB_DOCTYPE)
+            with xf.element(
+                f"{{{pkg_ns}}}package", {"unique-identifier": unique_identifier}, nsmap=nsmap
+            ):
+                # Copy metadata from the first part
+                xf.write("\n" + INDENT)
+                if metadata is None:
+                    metadata = etree.Element(f"{{{pkg_ns}}}metadata", nsmap=nsmap)
+                if total_time is not None:
+                    _set_total_time(metadata, pkg_ns, kind, total_time)
+                with xf.element(f"{{{pkg_ns}}}metadata"):
+                    children = [el for el in metadata if isinstance(el.tag, str)]
+                    for el in children:
+                        _write_element(xf, el, 2, nsmap)
+                    if children:
+                        xf.write("\n" + INDENT)
+                events.close()
+
+                package = etree.Element(f"{{{pkg_ns}}}package", nsmap=nsmap)
+                xf.write("\n" + INDENT)
+                with xf.element(f"{{{pkg_ns}}}manifest"):
+                    ncx_item = etree.SubElement(package, f"{{{pkg_ns}}}item")
+                    ncx_item.set("id", "ncx_merged")
+                    ncx_item.set("href", "navigation.ncx")
+                    ncx_item.set("media-type", "application/x-dtbncx+xml")
+                    _write_element(xf, ncx_item, 2, nsmap)
+                    for idx, part in enumerate(parts, start=1):
+                        for name, it in iter_part_opf(part["opf"]):
+                            if name == "item":
+                                _write_element(xf, _add_manifest_item(package, pkg_ns, it, idx), 2, nsmap)
+                                package.clear()
+                    xf.write("\n" + INDENT)
+                xf.write("\n" + INDENT)
+                with xf.element(f"{{{pkg_ns}}}spine", {"toc": "ncx_merged"}):
+                    for idx, part in enumerate(parts, start=1):
+                        for name, ref in iter_part_opf(part["opf"]):
+                            if name == "itemref":
+                                _write_element(xf, _add_itemref(package, pkg_ns, ref, idx), 2, nsmap)
+                                package.clear()
+                    xf.write("\n" + INDENT)
+                xf.write("\n")
+        f.write(b"\n")
+    return out_opf
+
+
+# Clock value của SMIL: full/partial clock ("0:01:46.588", "01:46.5") hoặc timecount
+# ("513.037s", "250ms"); "npt=" là tiền tố của SMIL 1.0 (DAISY 2.02)
+CLOCK_VALUE = re.compile(
+    r"\s*(?:npt=)?(?:(?:(?P<h>\d+):)?(?P<m>\d{1,2}):(?P<s>\d{1,2}(?:\.\d+)?)"
+    r"|(?P<count>\d+(?:\.\d+)?)(?P<unit>h|min|s|ms)?)\s*"
+)
+_UNIT_MS = {"h": 3_600_000, "min": 60_000, "s": 1000, "ms": 1, None: 1000}
+
+
+def clock_ms(value):
+    """Số mili giây của một clock value SMIL"""
+    m = CLOCK_VALUE.fullmatch(value)
+    if m is None:
+        raise ValueError(f"Clock value không hợp lệ: {value!r}")
+    if m["count"] is not None:
+        return round(float(m["count"]) * _UNIT_MS[m["unit"]])
+    return (int(m["h"] or 0) * 3600 + int(m["m"]) * 60) * 1000 + round(float(m["s"]) * 1000)
+
+
+def format_clock_ms(ms):
+    """Full clock value H:MM:SS.mmm như DAISY Pipeline ghi"""
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def part_smil_hrefs(opf_path):
+    """href các file SMIL của một phần theo thứ tự spine"""
+    smil, order = {}, []
+    for name, value in iter_part_opf(opf_path):
+        if name == "item" and value.media_type == "application/smil":
+            smil[value.id] = value.href
+        elif name == "itemref":
+            order.append(value.idref)
+    return [smil[idref] for idref in order if idref in smil]
+
+
+def smil_duration_ms(path):
+    """Thời lượng một file SMIL: dur của seq ngoài cùng trong body (chỉ đọc tới thẻ mở của
+    nó), không có dur thì cộng thời lượng các đoạn audio"""
+    clips = 0
+    for event, el in etree.iterparse(path, events=("start", "end"), recover=True):
+        name = etree.QName(el).localname
+        if event == "start":
+            if name == "seq" and el.get("dur") and etree.QName(el.getparent()).localname == "body":
+                return clock_ms(el.get("dur"))
+        elif name == "audio":
+            begin, end = el.get("clipBegin"), el.get("clipEnd")
+            if end:
+                clips += clock_ms(end) - (clock_ms(begin) if begin else 0)
+            el.clear()
+    return clips
+
+
+def rewrite_smil_elapsed(path, elapsed_ms):
+    """Đặt dtb:totalElapsedTime của một SMIL; False nếu giá trị đã đúng. Ghi ra file mới
+    rồi os.replace, không sửa tại chỗ vì file có thể là hardlink/reflink của file nguồn"""
+    value = format_clock_ms(elapsed_ms)
+    tree = parse_xml(path)
+    root = tree.getroot()
+    ns = root.nsmap.get(None)
+    q = f"{{{ns}}}" if ns else ""
+    head = root.find(f"{q}head")
+    if head is None:
+        head = root.makeelement(f"{q}head")
+        root.insert(0, head)
+    meta = next(
+        (m for m in head.iterfind(f"{q}meta") if m.get("name") == "dtb:totalElapsedTime"), None
+    )
+    if meta is None:
+        meta = etree.SubElement(head, f"{q}meta", name="dtb:totalElapsedTime")
+    elif meta.get("content") == value:
+        return False
+    meta.set("content", value)
+    tmp = path + ".tmp"
+    tree.write(tmp, encoding=tree.docinfo.encoding or "utf-8", xml_declaration=True)
+    os.replace(tmp, path)
+    return True
+
+
+def merge_smil_timeline(parts, out_root, entries, workers=None):
+    """Ghi lại dtb:totalElapsedTime của mọi SMIL trong output/parts thành thời gian tính từ
+    đầu sách, trả về tổng thời lượng (ms).
+
+    Thời lượng từng SMIL và offset của mỗi phần được lưu trong mục manifest ("timeline"):
+    phần không đổi chỉ phải ghi lại SMIL khi offset của nó đổi (phần trước dài/ngắn đi).
+    """
+
+    def read_timeline(entry):
+        part_root = os.path.join(out_root, "parts", f"part_{entry['part']:02d}")
+        hrefs = part_smil_hrefs(parts[entry["part"] - 1]["opf"])
+        return [[href, smil_duration_ms(os.path.join(part_root, href))] for href in hrefs]
+
+    def rewrite(job):
+        idx, offset, smil = job
+        part_root = os.path.join(out_root, "parts", f"part_{idx:02d}")
+        rewritten = 0
+        for href, ms in smil:
+            rewritten += rewrite_smil_elapsed(os.path.join(part_root, href), offset)
+            offset += ms
+        return rewritten
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 1) * 2)) as pool:
+        missing = [entry for entry in entries if "timeline" not in entry]
+        for entry, smil in zip(missing, pool.map(read_timeline, missing)):
+            entry["timeline"] = {"offset": None, "smil": smil}
+
+        jobs, offset = [], 0
+        for entry in entries:
+            timeline = entry["timeline"]
+            if timeline["offset"] != offset:
+                jobs.append((entry["part"], offset, timeline["smil"]))
+            offset += sum(ms for _, ms in timeline["smil"])
+        if jobs:
+            # Ghi manifest với offset None trước khi sửa SMIL: nếu dừng giữa chừng, lần sau
+            # các phần này chắc chắn được ghi lại, không bị bỏ qua vì offset cũ trùng khớp
+            by_part = {entry["part"]: entry for entry in entries}
+            for idx, _, _ in jobs:
+                by_part[idx]["timeline"]["offset"] = None
+            save_merge_manifest(out_root, entries)
+        rewritten = sum(pool.map(rewrite, jobs))
+        for idx, part_offset, _ in jobs:
+            by_part[idx]["timeline"]["offset"] = part_offset
+
+    smil_count = sum(len(entry["timeline"]["smil"]) for entry in entries)
+    print(
+        f"Timeline: {smil_count} SMIL, tổng {format_clock_ms(offset)}; ghi lại {rewritten} file "
+        f"ở {len(jobs)} phần ({time.perf_counter() - start:.2f} giây)"
+    )
+    return offset
+
+
+def load_merge_manifest(out_root):
+    """Manifest của lần merge trước: {số phần: mục}, rỗng nếu chưa có hoặc khác phiên bản"""
+    try:
+        with open(os.path.join(out_root, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return {entry["part"]: entry for entry in manifest["parts"]}
+
+
+def save_merge_manifest(out_root, entries):
+    path = os.path.join(out_root, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "parts": entries}, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def merge_parts(
+    parts, out_root, mode="auto", workers=None, check="mtime", full=False, stream=False
+):
+    """Hợp nhất các phần; chỉ copy và đọc lại OPF/NCX của phần đã thay đổi so với
+    manifest của lần merge trước (full=True: làm lại tất cả). stream=True: ghi
+    navigation.ncx/book.opf dần từ file của các phần, không giữ mô hình của cả sách"""
+    previous = {} if full else load_merge_manifest(out_root)
+    entries, changed = [], []
+    for idx, p in enumerate(parts, start=1):
+        fingerprint = part_fingerprint(p["dir"], check)
+        entry = previous.get(idx)
+        dst = os.path.join(out_root, "parts", f"part_{idx:02d}")
+        if (
+            entry is None
+            or entry["dir"] != p["dir"]
+            or entry["fingerprint"] != fingerprint
+            or not os.path.isdir(dst)
+        ):
+            entry = {"part": idx, "dir": p["dir"], "fingerprint": fingerprint}
+            changed.append(idx)
+        entries.append(entry)
+
+    print(f"{len(changed)}/{len(parts)} phần thay đổi: {changed}")
+
+    if changed:
+        copy_parts_as_is(parts, out_root, mode, workers, check, only=set(changed))
+    # Xóa các phần thừa của lần merge trước (số phần giảm)
+    parts_root = os.path.join(out_root, "parts")
+    for name in os.listdir(parts_root):
+        m = re.fullmatch(r"part_(\d+)", name)
+        if m and int(m.group(1)) > len(parts):
+            shutil.rmtree(os.path.join(parts_root, name))
+
+    total_time = format_clock_ms(merge_smil_timeline(parts, out_root, entries, workers))
+    if stream:
+        for entry in entries:
+            entry.pop("model", None)
+        stream_merged_ncx(parts, out_root)
+        stream_merged_opf(parts, out_root, total_time)
+    else:
+        # Đọc OPF/NCX của các phần chưa có mô hình (đã thay đổi, hoặc lần trước chạy
+        # --stream) song song, phần còn lại lấy từ manifest
+        missing = [entry for entry in entries if "model" not in entry]
+        with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 1) * 2)) as pool:
+            for entry, model in zip(
+                missing, pool.map(load_part_model, [parts[e["part"] - 1] for e in missing])
+            ):
+                entry["model"] = model.to_json()
+        models = [PartModel.from_json(entry["model"]) for entry in entries]
+        build_merged_ncx(models, out_root)
+        build_merged_opf(models, out_root, total_time)
+    save_merge_manifest(out_root, entries)
+
+
 if __name__ == "__main__":
-    parent_dir = os.path.abspath(sys.argv[1])
-    out_root = os.path.abspath(sys.argv[2])
+    parser = argparse.ArgumentParser(description="Hợp nhất các phần DAISY thành một sách")
+    parser.add_argument("input", help="thư mục chứa các phần DAISY")
+    parser.add_argument("output", help="thư mục sách đã hợp nhất")
+    parser.add_argument(
+        "--mode",
+        choices=("auto", "link", "copy"),
+        default="auto",
+        help="auto: reflink nếu filesystem hỗ trợ; link: hardlink; copy: luôn copy",
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None, help="số luồng copy")
+    parser.add_argument(
+        "--full", action="store_true", help="bỏ qua manifest, copy và dựng lại mọi phần"
+    )
+    parser.add_argument(
+        "--check",
+        choices=("mtime", "hash"),
+        default="mtime",
+        help="cách nhận biết file không đổi từ lần merge trước",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="ghi NCX/OPF dần từ các phần (bộ nhớ theo phần lớn nhất, không theo cả sách)",
+    )
+    args = parser.parse_args()
+
+    parent_dir = os.path.abspath(args.input)
+    out_root = os.path.abspath(args.output)
     parts = discover_parts(parent_dir)
-    copy_parts_as_is(parts, out_root)
-    build_merged_ncx(parts, out_root)
-    build_merged_opf(parts, out_root)
+    merge_parts(parts, out_root, args.mode, args.workers, args.check, args.full, args.stream)
@@ -0,0 +1,54 @@
+import sys
+import time
+
+from helper import clean_page_text, clean_page_text_per_line
+from page_cache import PageCache
+from page_extract import iter_page_texts
+from pdf_to_dtbook import BOOKS_DIR, load_book_config
+
+# Các trường hợp biên không có trong 3 sách
+EDGE_CASES = [
+    "12/300\n  Trang 5/10   http://abc.vn/x y\nHTTPS://THUVIENSACH.VN cuối",
+    "Trang\x1f1/2\thttp://a\x0bb Trang 3/4\n http://c",
+    "Trang https://thuviensach.vn 1/2 http://x còn lại",
+    "a b\x85c\x1cd\r\ne  ★ ₫ → “ngoặc” – — … ©",
+    " 　 chữ tổ hợp é ſ https://thuviensachſvn",
+]
+
+
+def load_pages():
+    """Text gốc của các trang trong mọi sách ở books/ (đọc qua PageCache)"""
+    pages = []
+    for path in sorted(BOOKS_DIR.glob("*.json")):
+        config = load_book_config(path)
+        for _, raw, _ in iter_page_texts(config["pdf"], config["book_info"], cache=PageCache()):
+            pages.append((raw, config["book_info"]))
+    return pages
+
+
+def pages_per_second(func, pages, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw, book_info in pages:
+            func(raw, book_info)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+if __name__ == "__main__":
+    pages = load_pages()
+    pages += [(text, pages[0][1]) for text in EDGE_CASES]
+
+    mismatches = [
+        raw for raw, info in pages if clean_page_text(raw, info) != clean_page_text_per_line(raw, info)
+    ]
+    if mismatches:
+        print(f"Kết quả khác nhau ở {len(mismatches)} trang, vd. {mismatches[:1]!r}")
+        sys.exit(1)
+
+    size = sum(len(raw) for raw, _ in pages)
+    print(f"{len(pages)} trang, {size / 1e6:.1f} triệu ký tự")
+    b = pages_per_second(clean_page_text_per_line, pages)
+    a = pages_per_second(clean_page_text, pages)
+    print(f"clean_page_text: {b:,.0f} -> {a:,.0f} trang/giây (x{a / b:.2f})")
@@ -0,0 +1,64 @@
+import sys
+import time
+
+from helper import SentenceSegmenter, split_into_paragraphs, split_into_paragraphs_optimized
+from page_cache import PageCache
+from page_extract import iter_page_texts
+from pdf_to_dtbook import BOOKS_DIR, load_book_config
+
+# Các trường hợp biên không có trong 3 sách
+EDGE_CASES = [
+    "",
+    "   ",
+    "Không có dấu câu",
+    "  Câu một.   Câu hai!\tCâu ba?\n\nCâu bốn.  ",
+    "Ở TP. Hồ Chí Minh, xem Tr. 12. Ông Mr. Smith tới. Hết.",
+    "...  ?! . a",
+]
+
+
+def load_texts():
+    """Text đã làm sạch của các trang trong mọi sách ở books/ (đọc qua PageCache)"""
+    texts = []
+    for path in sorted(BOOKS_DIR.glob("*.json")):
+        config = load_book_config(path)
+        for _, _, text in iter_page_texts(config["pdf"], config["book_info"], cache=PageCache()):
+            texts.append((text, config["sentences_per_paragraph"]))
+    return texts
+
+
+def pages_per_second(func, texts, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text, n in texts:
+            for _ in func(text, n):
+                pass
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+if __name__ == "__main__":
+    texts = load_texts()
+    texts += [(text, n) for text in EDGE_CASES for n in (1, 2, 4)]
+
+    # Không có từ viết tắt thì phải cho kết quả giống hệt bản cũ
+    plain = SentenceSegmenter(abbreviations=())
+    mismatches = [
+        text
+        for text, n in texts
+        if list(plain.paragraphs(text, n)) != split_into_paragraphs_optimized(text, n)
+    ]
+    if mismatches:
+        print(f"Kết quả khác nhau ở {len(mismatches)} trang, vd. {mismatches[:1]!r}")
+        sys.exit(1)
+
+    changed = sum(
+        list(split_into_paragraphs(text, n)) != split_into_paragraphs_optimized(text, n)
+        for text, n in texts
+    )
+    size = sum(len(text) for text, _ in texts)
+    print(f"{len(texts)} trang, {size / 1e6:.1f} triệu ký tự; từ viết tắt đổi cách chia ở {changed} trang")
+    b = pages_per_second(split_into_paragraphs_optimized, texts)
+    a = pages_per_second(split_into_paragraphs, texts)
+    print(f"split_into_paragraphs: {b:,.0f} -> {a:,.0f} trang/giây (x{a / b:.2f})")
@@ -0,0 +1,191 @@
+from lxml import etree
+
+from helper import create_dtbook_structure
+
+INDENT = "  "
+
+
+class DTBookWriter:
+    """Ghi DTBook ra đĩa dần theo từng trang bằng etree.xmlfile.
+
+    `sections` là danh sách level1 theo thứ tự trong sách, mỗi phần tử là dict
+    {"id", "heading_id", "title", "container"}; `containers` là các cặp (tag, id)
+    theo thứ tự (frontmatter/bodymatter/backmatter). Level1 đang ghi ("head") được
+    ghi thẳng ra file; nội dung của các level1 phía sau chỉ được giữ tạm trong bộ
+    nhớ cho tới khi gọi finish_before()/close(). Chỉ số len(sections) là phần cuối
+    container cuối cùng (sau mọi level1). Kết quả giống hệt khi dựng cả cây lxml rồi
+    tree.write(..., pretty_print=True).
+    """
+
+    def __init__(self, out_path, book_info, sections, containers=(("bodymatter", "bodymatter"),)):
+        self.out_path = out_path
+        self.sections = sections
+        self.containers = list(containers)
+        self._pending = [[] for _ in range(len(sections) + 1)]
+        self._head = 0
+        self._head_open = False
+        self._container = -1  # chỉ số container cuối cùng đã ghi ra đĩa
+        self._container_open = False
+        self._current = len(sections)
+        self._level2_open = False
+
+        dtbook, _ = create_dtbook_structure(book_info)
+        header = etree.tostring(dtbook, encoding="UTF-8", xml_declaration=True, pretty_print=True)
+        self._file = open(out_path, "wb")
+        self._file.write(header[: -len(b"</dtbook>\n")] + INDENT.encode())
+        self._xf_context = etree.xmlfile(self._file, encoding="utf-8")
+        self._xf = self._xf_context.__enter__()
+        self._stack = []
+        self._open("book")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    # --- ghi ra đĩa ---
+
+    def _newline(self):
+        self._xf.write("\n" + INDENT * (len(self._stack) + 1))
+
+    def _open(self, tag, **attrib):
+        if self._stack:
+            self._newline()
+        context = self._xf.element(tag, attrib)
+        context.__enter__()
+        self._stack.append(context)
+
+    def _close(self):
+        context = self._stack.pop()
+        self._newline()
+        context.__exit__(None, None, None)
+
+    def _leaf(self, tag, text=None, **attrib):
+        self._newline()
+        element = etree.Element(tag, attrib)
+        element.text = text
+        self._xf.write(element)
+
+    def _write_event(self, event):
+        kind = event[0]
+        if kind == "pagenum":
+            self._leaf("pagenum", str(event[1]), id=f"page_{event[1]}")
+        elif kind == "p":
+            _, text, breaks = event
+            if not breaks:
+                self._leaf("p", text)
+                return
+            # Trang mới bắt đầu giữa đoạn: pagenum nằm trong <p> đúng vị trí ngắt trang
+            self._newline()
+            element = etree.Element("p")
+            element.text = text[: breaks[0][0]]
+            for k, (offset, page) in enumerate(breaks):
+                pagenum = etree.SubElement(element, "pagenum", id=f"page_{page}")
+                pagenum.text = str(page)
+                pagenum.tail = text[offset : breaks[k + 1][0] if k + 1 < len(breaks) else None]
+            self._xf.write(element)
+        elif kind == "level2":
+            _, section_id, heading_id, title = event
+            self._open("level2", id=section_id)
+            self._leaf("h2", title, id=heading_id)
+        else:  # "end" của level2
+            self._close()
+
+    def _open_container(self, index, empty=False):
+        """Đóng container đang mở, ghi các container rỗng ở giữa rồi mở container `index`"""
+        while self._container < index:
+            if self._container_open:
+                self._close()
+                self._container_open = False
+            self._container += 1
+            tag, container_id = self.containers[self._container]
+            if self._container == index and not empty:
+                self._open(tag, id=container_id)
+                self._container_open = True
+            else:
+                self._leaf(tag, id=container_id)
+
+    def _open_head(self):
+        if self._head_open:
+            return
+        if self._head < len(self.sections):
+            section = self.sections[self._head]
+            tags = [tag for tag, _ in self.containers]
+            self._open_container(tags.index(section["container"]))
+            self._open("level1", id=section["id"])
+            self._leaf("h1", section["title"], id=section["heading_id"])
+        else:
+            self._open_container(len(self.containers) - 1)
+        for event in self._pending[self._head]:
+            self._write_event(event)
+        self._pending[self._head] = []
+        self._head_open = True
+
+    def _emit(self, index, event):
+        if index < self._head:
+            raise ValueError(
+                f"Section {self.sections[index]['id']} đã được ghi ra {self.out_path}"
+            )
+        if index == self._head:
+            self._open_head()
+            self._write_event(event)
+        else:
+            self._pending[index].append(event)
+
+    # --- API ---
+
+    def _leave_level2(self):
+        if self._level2_open:
+            self._emit(self._current, ("end",))
+            self._level2_open = False
+
+    def enter(self, index):
+        """Nội dung tiếp theo thuộc level1 thứ `index`"""
+        self._leave_level2()
+        self._current = index
+
+    def enter_subsection(self, index, section_id, heading_id, title):
+        """Mở level2 mới ở cuối level1 thứ `index`, nội dung tiếp theo thuộc level2 này"""
+        self._leave_level2()
+        self._current = index
+        self._emit(index, ("level2", section_id, heading_id, title))
+        self._level2_open = True
+
+    def pagenum(self, page):
+        self._emit(self._current, ("pagenum", page))
+        self._xf.flush()
+
+    def paragraph(self, text, breaks=()):
+        """Thêm đoạn văn; `breaks` là các (vị trí trong text, số trang) nơi trang mới bắt đầu"""
+        self._emit(self._current, ("p", text, tuple(breaks)))
+
+    def finish_before(self, index):
+        """Các level1 trước `index` sẽ không nhận thêm nội dung: ghi hết ra đĩa"""
+        if self._current < index:
+            self._leave_level2()
+        while self._head < index:
+            self._open_head()
+            if self._head < len(self.sections):
+                self._close()
+            self._head += 1
+            self._head_open = False
+
+    def close(self):
+        self._leave_level2()
+        self.finish_before(len(self.sections))
+        last = len(self.containers) - 1
+        if self._head_open or self._pending[-1]:
+            self._open_head()
+            self._close()
+        elif self._container_open and self._container == last:
+            self._close()
+        else:
+            self._open_container(last, empty=True)
+        self._close()  # book
+        self._xf_context.__exit__(None, None, None)
+        self._file.write(b"\n</dtbook>\n")
+        self._file.close()
@@ -2,8 +2,50 @@ import re
 from lxml import etree
 
 
+# Các regex dùng cho cả trang (các dòng nối bằng "\n"): `[^\S\n]`, `\S` và `.` không
+# vượt qua "\n" nên kết quả giống hệt khi xử lý từng dòng như clean_page_text_per_line
+_FOOTER_SITE = re.compile(r"https://thuviensach.vn", re.IGNORECASE)
+_FOOTER_PAGE = re.compile(r"Trang[^\S\n]+\d+/\d+[^\S\n]+http://\S+", re.IGNORECASE)
+_PAGE_NUMBER_LINE = re.compile(r"^[^\S\n]*\d+/\d+[^\S\n]*$", re.MULTILINE)
+_DISALLOWED_CHARS = re.compile(
+    r"[^\w\s\.,!?;:()\-\"\'àáảãạầấẩẫậằắẳẵặèéẻẽẹềếểễệìíỉĩịòóỏõọồốổỗộờớởỡợùúủũụừứửữựỳýỷỹỵđĐ]"
+)
+_cleaners = {}
+
+
+def make_page_cleaner(book_info: dict[str, str]):
+    """Hàm làm sạch trang dựng sẵn cho một sách, cho kết quả giống clean_page_text_per_line"""
+    title, author = book_info["title"], book_info["author"]
+    repeated_lines = re.compile(
+        rf"^.*(?:{re.escape(title)}|{re.escape(author)}).*$", re.MULTILINE
+    )
+
+    def clean(text: str) -> str:
+        # splitlines() tách cả \r, \x0b, \x0c, \x85, \u2028...; đưa về "\n" cho regex
+        page = "\n".join(text.splitlines())
+        # Bỏ dòng lặp lại title/author (ít gặp, kiểm tra nhanh bằng `in` trước) và số trang
+        if title in page or author in page:
+            page = repeated_lines.sub("", page)
+        page = _PAGE_NUMBER_LINE.sub("", page)
+        # Bỏ footer
+        page = _FOOTER_PAGE.sub("", _FOOTER_SITE.sub("", page))
+        # Bỏ ký tự đặc biệt, gộp khoảng trắng
+        return " ".join(_DISALLOWED_CHARS.sub("", page).split())
+
+    return clean
+
+
 def clean_page_text(text: str, book_info: dict[str, str]) -> str:
     """Làm sạch text từ PDF, loại bỏ header/footer và text không cần thiết"""
+    key = (book_info["title"], book_info["author"])
+    cleaner = _cleaners.get(key)
+    if cleaner is None:
+        cleaner = _cleaners[key] = make_page_cleaner(book_info)
+    return cleaner(text)
+
+
+def clean_page_text_per_line(text: str, book_info: dict[str, str]) -> str:
+    """Bản làm sạch gốc (từng dòng, regex chưa biên dịch), giữ lại để đối chiếu/benchmark"""
     lines = text.splitlines()
     cleaned = []
     for line in lines:
@@ -32,6 +74,105 @@ def clean_page_text(text: str, book_info: dict[str, str]) -> str:
     return re.sub(r"\s+", " ", " ".join(cleaned)).strip()
 
 
+# Từ viết tắt kết thúc bằng dấu chấm nhưng không kết thúc câu
+ABBREVIATIONS = (
+    "TP.", "Tp.", "Tr.", "tr.", "TS.", "ThS.", "GS.", "PGS.", "BS.", "KS.", "Q.",
+    "St.", "Dr.", "Mr.", "Mrs.", "Ms.", "Jr.",
+)
+_LEADING_SPACE = re.compile(r"\s*")
+
+
+class SentenceSegmenter:
+    """Tách câu bằng regex biên dịch sẵn, trả về vị trí (start, end) của câu trong text.
+
+    Ranh giới câu là khoảng trắng sau . ! ? (như split_into_paragraphs_optimized),
+    trừ khi dấu chấm thuộc một từ viết tắt trong `abbreviations`.
+    """
+
+    def __init__(self, abbreviations=ABBREVIATIONS):
+        # Lookbehind phải có độ dài cố định: gộp các từ viết tắt cùng độ dài vào một nhóm
+        by_length = {}
+        for a in abbreviations:
+            by_length.setdefault(len(a), []).append(re.escape(a))
+        not_abbreviation = "".join(
+            rf"(?<!\b(?:{'|'.join(group)}))" for group in by_length.values()
+        )
+        # Bắt đầu bằng [.!?] (không dùng lookbehind) để regex nhảy nhanh tới dấu câu;
+        # ranh giới thực sự bắt đầu sau dấu câu, tức m.start() + 1
+        self.boundary = re.compile(rf"[.!?]{not_abbreviation}\s+")
+        # Text kết thúc bằng câu hoàn chỉnh (cho phép ngoặc/nháy đóng sau dấu câu)
+        self.final = re.compile(rf"[.!?]{not_abbreviation}[\"')]*\s*$")
+        # .* tham lam rồi lùi dần từ cuối: tìm ranh giới câu cuối cùng mà không duyệt cả text
+        self.last_boundary = re.compile(rf"(?s).*({self.boundary.pattern})")
+
+    def spans(self, text, pos=0):
+        """(start, end) của từng câu (đã bỏ khoảng trắng hai đầu), không tạo chuỗi con"""
+        start = _LEADING_SPACE.match(text, pos).end()
+        for m in self.boundary.finditer(text, start):
+            yield start, m.start() + 1
+            start = m.end()
+        end = len(text.rstrip())  # rstrip() không tạo chuỗi mới khi không có khoảng trắng cuối
+        if start < end:
+            yield start, end
+
+    def paragraph_spans(self, text, sentences_per_paragraph=4, end=None):
+        """(start, end) của từng đoạn gồm `sentences_per_paragraph` câu trong text[:end]"""
+        if end is None:
+            end = len(text.rstrip())
+        first = _LEADING_SPACE.match(text).end()
+        count = 0
+        for m in self.boundary.finditer(text, first, end):
+            count += 1
+            if count == sentences_per_paragraph:
+                yield first, m.start() + 1
+                first, count = m.end(), 0
+        if first < end:
+            yield first, end
+
+    def split_unfinished(self, text):
+        """(end, tail): text[:end] là các câu hoàn chỉnh, text[tail:] là câu dở dang ở cuối
+        (chưa kết thúc bằng . ! ?), rỗng nếu tail == len(text)"""
+        end = len(text.rstrip())
+        last = end - 1
+        while last > 0 and text[last] in "\"')":
+            last -= 1
+        if end == 0 or self.final.match(text, last):
+            return end, len(text)
+        m = self.last_boundary.match(text)
+        if m is None:
+            return 0, _LEADING_SPACE.match(text).end()
+        return m.start(1) + 1, m.end(1)
+
+    def paragraphs(self, text, sentences_per_paragraph=4):
+        """Gộp mỗi `sentences_per_paragraph` câu thành một đoạn (các câu nối bằng một dấu cách)"""
+        # Text đã làm sạch chỉ có dấu cách đơn (isprintable() loại \n, \t, \xa0...):
+        # đoạn văn là lát cắt liền của text, không phải nối lại các câu
+        sliced = text.isprintable() and "  " not in text
+        first = _LEADING_SPACE.match(text).end()
+        count = 0
+        for m in self.boundary.finditer(text, first):
+            count += 1
+            if count == sentences_per_paragraph:
+                end = m.start() + 1
+                yield text[first:end] if sliced else self._join(text[first:end])
+                first, count = m.end(), 0
+        end = len(text.rstrip())
+        if first < end:
+            yield text[first:end] if sliced else self._join(text[first:end])
+
+    def _join(self, paragraph):
+        """Thay khoảng trắng giữa các câu bằng một dấu cách"""
+        return self.boundary.sub(lambda m: m.group()[0] + " ", paragraph)
+
+
+_segmenter = SentenceSegmenter()
+
+
+def split_into_paragraphs(text, sentences_per_paragraph=4):
+    """Chia text thành các đoạn văn, mỗi đoạn `sentences_per_paragraph` câu"""
+    return _segmenter.paragraphs(text, sentences_per_paragraph)
+
+
 def split_into_paragraphs_optimized(text, sentences_per_paragraph=4):
     """Chia text thành các đoạn văn với 3-4 câu mỗi paragraph (optimized for memory)"""
     if not text.strip():
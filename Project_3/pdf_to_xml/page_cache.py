@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent / ".page_cache"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+MAGIC = b"PAGECACHE1\n"
+_HEADER_LEN = struct.Struct("<I")
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def clean_key(book_info: dict[str, str]) -> str:
+    """clean_page_text chỉ phụ thuộc title/author của book_info"""
+    return hashlib.sha256(
+        f"{book_info['title']}\0{book_info['author']}".encode("utf-8")
+    ).hexdigest()
+
+
+class PageCache:
+    """Cache text đã trích từ PDF, khóa theo hash nội dung file PDF + số trang.
+
+    Mỗi PDF là một file `<sha256>.pages`: MAGIC | độ dài header | header JSON
+    (đường dẫn nguồn cùng size + mtime của nó lúc ghi, số trang, clean_key, chỉ mục
+    offset từng trang) | các khối zlib.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def _path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.pages"
+
+    @staticmethod
+    def _read_header(f):
+        """(header, offset phần thân); file hỏng hay bị cắt cụt đều báo ValueError"""
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("File cache không hợp lệ")
+        try:
+            (length,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+        except struct.error as e:
+            raise ValueError("File cache bị cắt cụt") from e
+        header = json.loads(f.read(length))
+        if not isinstance(header, dict):
+            raise ValueError("File cache không hợp lệ")
+        return header, f.tell()
+
+    def load(self, pdf_path, book_info, digest=None):
+        """(tổng số trang của PDF hoặc None, {số trang: (text gốc, text đã làm sạch)}).
+
+        Text đã làm sạch là None nếu cache được ghi với book_info khác. `digest`:
+        file_sha256(pdf_path) nếu caller đã tính.
+        """
+        path = self._path(digest or file_sha256(pdf_path))
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None, {}
+        pages = {}
+        with f:
+            try:
+                header, body = self._read_header(f)
+                same_clean = header["clean_key"] == clean_key(book_info)
+                for page, (raw_off, raw_len, clean_off, clean_len) in header["index"].items():
+                    f.seek(body + raw_off)
+                    raw = zlib.decompress(f.read(raw_len)).decode("utf-8")
+                    cleaned = None
+                    if same_clean:
+                        f.seek(body + clean_off)
+                        cleaned = zlib.decompress(f.read(clean_len)).decode("utf-8")
+                    pages[int(page)] = (raw, cleaned)
+                page_count = header["page_count"]
+            except (ValueError, KeyError, TypeError, zlib.error):
+                pages = None
+        if pages is None:
+            # File cache hỏng: coi như chưa có cache, xóa để lần sau ghi lại
+            path.unlink(missing_ok=True)
+            return None, {}
+        os.utime(path)  # đánh dấu vừa dùng cho việc loại bỏ theo LRU
+        return page_count, pages
+
+    def store(
+        self,
+        pdf_path,
+        book_info,
+        pages: dict[int, tuple[str, str]],
+        page_count,
+        digest=None,
+        existing=None,
+    ):
+        """Ghi text gốc và text đã làm sạch của các trang, gộp với `existing` (các trang
+        caller đã lấy bằng load(), để không phải đọc lại và giải nén file cache)"""
+        digest = digest or file_sha256(pdf_path)
+        key = clean_key(book_info)
+        merged = {i: entry for i, entry in (existing or {}).items() if entry[1] is not None}
+        merged.update(pages)
+
+        index, chunks, offset = {}, [], 0
+        for i in sorted(merged):
+            raw, cleaned = merged[i]
+            entry = []
+            for text in (raw, cleaned):
+                data = zlib.compress(text.encode("utf-8"), 6)
+                entry += [offset, len(data)]
+                chunks.append(data)
+                offset += len(data)
+            index[str(i)] = entry
+        st = os.stat(pdf_path)
+        header = json.dumps(
+            {
+                "source": str(Path(pdf_path).resolve()),
+                "source_size": st.st_size,
+                "source_mtime_ns": st.st_mtime_ns,
+                "page_count": page_count,
+                "clean_key": key,
+                "index": index,
+            }
+        ).encode("utf-8")
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(digest)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+            for data in chunks:
+                f.write(data)
+        os.replace(tmp, path)
+        self.prune()
+
+    @staticmethod
+    def _source_matches(header):
+        """File nguồn vẫn còn và chưa bị sửa (cùng size + mtime lúc ghi cache)"""
+        try:
+            st = os.stat(header["source"])
+        except (KeyError, OSError):
+            return False
+        return (st.st_size, st.st_mtime_ns) == (
+            header.get("source_size"),
+            header.get("source_mtime_ns"),
+        )
+
+    def prune(self):
+        """Xóa cache của PDF không còn tồn tại hoặc đã bị sửa tại chỗ (khác size/mtime),
+        rồi xóa file cũ nhất khi vượt max_bytes"""
+        if not self.cache_dir.exists():
+            return
+        entries = []
+        for path in self.cache_dir.glob("*.pages"):
+            try:
+                with open(path, "rb") as f:
+                    header = self._read_header(f)[0]
+            except (OSError, ValueError):
+                header = None
+            if header is None or not self._source_matches(header):
+                path.unlink()
+                continue
+            st = path.stat()
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= size
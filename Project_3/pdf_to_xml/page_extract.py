@@ -0,0 +1,92 @@
+import os
+from multiprocessing import Pool
+
+from pypdf import PdfReader
+from helper import clean_page_text
+from page_cache import file_sha256
+
+# PdfReader đã mở trong tiến trình hiện tại (mỗi worker mở file riêng một lần)
+_readers = {}
+
+
+def _get_reader(pdf_path):
+    reader = _readers.get(pdf_path)
+    if reader is None:
+        reader = _readers[pdf_path] = PdfReader(pdf_path)
+    return reader
+
+
+def extract_page_range(args):
+    """Trích và làm sạch text các trang first..last (đánh số từ 1)"""
+    pdf_path, first, last, book_info = args
+    reader = _get_reader(str(pdf_path))
+    pages = []
+    for i in range(first, last + 1):
+        raw_text = reader.pages[i - 1].extract_text() or ""
+        pages.append((i, raw_text, clean_page_text(raw_text, book_info)))
+    return pages
+
+
+def page_count(pdf_path) -> int:
+    return len(_get_reader(str(pdf_path)).pages)
+
+
+def _page_batches(pages, batch_size):
+    """Gom các số trang (tăng dần) thành các khoảng liên tiếp dài tối đa batch_size"""
+    batches = []
+    for i in pages:
+        if batches and batches[-1][1] == i - 1 and i - batches[-1][0] < batch_size:
+            batches[-1][1] = i
+        else:
+            batches.append([i, i])
+    return batches
+
+
+def _extract_pages(pdf_path, book_info, pages, processes, batch_size):
+    tasks = [
+        (pdf_path, start, end, book_info)
+        for start, end in _page_batches(pages, batch_size)
+    ]
+    processes = processes or os.cpu_count()
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield from extract_page_range(task)
+        return
+    with Pool(min(processes, len(tasks)), initializer=_readers.clear) as pool:
+        for batch in pool.imap(extract_page_range, tasks):
+            yield from batch
+
+
+def iter_page_texts(
+    pdf_path, book_info, first=1, last=None, processes=None, batch_size=8, cache=None
+):
+    """Trả về (số trang, text gốc, text đã làm sạch) theo đúng thứ tự trang.
+
+    Các khối `batch_size` trang được trích song song trong process pool,
+    processes=1 chạy tuần tự trong tiến trình hiện tại. Nếu có `cache`
+    (PageCache), trang đã có trong cache không cần mở bằng pypdf nữa.
+    """
+    total, cached, digest = None, {}, None
+    if cache is not None:
+        digest = file_sha256(pdf_path)
+        total, cached = cache.load(pdf_path, book_info, digest)
+    if total is None:
+        total = page_count(pdf_path)
+    last = total if last is None else min(last, total)
+    missing = [i for i in range(first, last + 1) if i not in cached]
+    extracted = _extract_pages(pdf_path, book_info, missing, processes, batch_size)
+
+    new_pages = {}
+    for i in range(first, last + 1):
+        if i in cached:
+            raw_text, text = cached[i]
+            if text is None:
+                text = clean_page_text(raw_text, book_info)
+                new_pages[i] = (raw_text, text)
+            yield i, raw_text, text
+        else:
+            page = next(extracted)
+            new_pages[i] = page[1:]
+            yield page
+    if cache is not None and new_pages:
+        cache.store(pdf_path, book_info, new_pages, total, digest, cached)
@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import re
+import uuid
+from copy import deepcopy
+from pathlib import Path
+
+from dtbook_writer import DTBookWriter
+from helper import SentenceSegmenter, validate_dtbook
+from page_cache import PageCache
+from page_extract import iter_page_texts
+from section_detect import SectionDetector
+from section_index import SectionIndex, outline_entries, outline_start_pages
+
+BOOKS_DIR = Path(__file__).parent / "books"
+
+
+def load_book_config(path) -> dict:
+    """Đọc cấu hình JSON của một sách, điền giá trị mặc định.
+
+    Các khóa: pdf (đường dẫn tương đối so với file cấu hình), output, book_info,
+    first_page/last_page, sections ("outline" hoặc danh sách {title, id, level,
+    parent, container, match}), containers, split_every, sentences_per_paragraph,
+    strip_heading, locate ("outline": trang bắt đầu của section lấy từ đích của mục
+    outline cùng tiêu đề; "text": nhận diện theo text từng trang, cũng là cách dùng
+    khi PDF không có outline), transition ("forward"/"once"), initial_section, fuzzy
+    (so khớp `contains` bỏ qua khoảng trắng, chịu được dấu bị tách như "SỈ NHỤ C"),
+    join_pages (câu bị ngắt trang được nối với phần tiếp theo ở trang sau).
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    config["pdf"] = (path.parent / config["pdf"]).resolve()
+    config["book_info"].setdefault("identifier", f"dtb-{uuid.uuid4()}")
+    entries = None
+    if config.get("sections", "outline") == "outline":
+        # Mỗi mục outline là một level1, nhận diện khi trang bắt đầu bằng tiêu đề
+        entries = outline_entries(config["pdf"])
+        config["sections"] = [{"title": t} for t, _ in entries]
+    for i, section in enumerate(config["sections"]):
+        section.setdefault("level", 1)
+        section.setdefault("container", "bodymatter")
+        section.setdefault("match", [{"regex": "^" + re.escape(section["title"].strip())}])
+        if "id" in section:
+            section["heading_id"] = f"h{section['level']}_{section['id']}"
+        else:
+            section["id"], section["heading_id"] = f"sec_{i + 1}", f"h1_{i + 1}"
+    config.setdefault("containers", [["bodymatter", "bodymatter"]])
+    config.setdefault("first_page", 1)
+    config.setdefault("last_page", None)
+    config.setdefault("split_every", None)
+    config.setdefault("sentences_per_paragraph", 4)
+    config.setdefault("strip_heading", False)
+    config.setdefault("transition", "forward")
+    config.setdefault("initial_section", 0)
+    config.setdefault("fuzzy", False)
+    config.setdefault("locate", "outline")
+    config.setdefault("join_pages", True)
+    config["section_pages"] = None
+    if config["locate"] == "outline":
+        if entries is None:
+            entries = outline_entries(config["pdf"])
+        config["section_pages"] = outline_start_pages(config["sections"], entries)
+        if config["section_pages"] is None and entries:
+            print("⚠️ Outline không khớp các section, nhận diện section theo text từng trang")
+    return config
+
+
+class PartedWriter:
+    """Các DTBookWriter nối tiếp nhau, mỗi file chứa `split_every` level1"""
+
+    def __init__(self, writers, split_every):
+        self.writers = writers
+        self.split_every = split_every
+        self._closed = 0
+        self._current = writers[-1]
+
+    def _locate(self, index):
+        part = min(index // self.split_every, len(self.writers) - 1)
+        return part, index - part * self.split_every
+
+    def enter(self, index):
+        part, local = self._locate(index)
+        self._current = self.writers[part]
+        self._current.enter(local)
+
+    def enter_subsection(self, index, *heading):
+        part, local = self._locate(index)
+        self._current = self.writers[part]
+        self._current.enter_subsection(local, *heading)
+
+    def finish_before(self, index):
+        part, local = self._locate(index)
+        while self._closed < part:
+            self.writers[self._closed].close()
+            self._closed += 1
+        self.writers[part].finish_before(local)
+
+    def pagenum(self, page):
+        self._current.pagenum(page)
+
+    def paragraph(self, text, breaks=()):
+        self._current.paragraph(text, breaks)
+
+    def close(self):
+        for writer in self.writers[self._closed :]:
+            writer.close()
+        self._closed = len(self.writers)
+
+
+def open_writers(config, level1):
+    """DTBookWriter cho cả sách, hoặc PartedWriter nếu có split_every"""
+    output, book_info = config["output"], config["book_info"]
+    containers = [tuple(c) for c in config["containers"]]
+    step = config["split_every"]
+    if not step:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        return DTBookWriter(output, book_info, level1, containers), [output]
+
+    writers, outputs = [], []
+    for start in range(0, len(level1), step):
+        part = start // step + 1
+        bi = deepcopy(book_info)
+        bi["identifier"] = f"{book_info['identifier']}-p{part:02d}"
+        outfile = output.format(part=part)
+        os.makedirs(os.path.dirname(outfile) or ".", exist_ok=True)
+        writers.append(
+            DTBookWriter(
+                outfile,
+                bi,
+                level1[start : start + step],
+                [(tag, f"{cid}_p{part:02d}") for tag, cid in containers],
+            )
+        )
+        outputs.append(outfile)
+    return PartedWriter(writers, step), outputs
+
+
+def convert_book(config, processes=None, cache=True) -> list[str]:
+    """Chuyển PDF sang DTBook theo cấu hình, trả về danh sách file đã ghi"""
+    sections = config["sections"]
+    # Có trang bắt đầu từ outline thì không cần nhận diện section theo text
+    index = SectionIndex(config["section_pages"]) if config["section_pages"] else None
+    detector = SectionDetector(sections, fuzzy=config["fuzzy"])
+    # Các section cùng tiêu đề với mỗi section (theo thứ tự), tính sẵn một lần
+    same_title = {}
+    for idx, section in enumerate(sections):
+        same_title.setdefault(section["title"], []).append(idx)
+
+    # Level1 có sẵn theo thứ tự; level2 chỉ được ghi khi tìm thấy
+    level1 = [s for s in sections if s["level"] == 1]
+    level1_index = {s["id"]: k for k, s in enumerate(level1)}
+    parent_of = [
+        level1_index[s["id"]] if s["level"] == 1 else level1_index.get(s.get("parent"))
+        for s in sections
+    ]
+    writer, outputs = open_writers(config, level1)
+
+    segmenter = SentenceSegmenter()
+    n = config["sentences_per_paragraph"]
+    # Chỉ giữ câu dở dang cuối trang trước (không giữ cả section) cùng vị trí bắt đầu
+    # các trang nằm trong câu đó
+    carry, carry_breaks = "", []
+
+    def flush_carry():
+        nonlocal carry, carry_breaks
+        if carry:
+            writer.paragraph(carry, carry_breaks)
+            carry, carry_breaks = "", []
+
+    def switch_to(idx):
+        # Câu dở dang không kéo sang section mới
+        flush_carry()
+        section = sections[idx]
+        parent = parent_of[idx]
+        if parent is None:
+            return
+        if section["level"] == 1:
+            writer.enter(parent)
+            if not once:
+                writer.finish_before(parent)
+        else:
+            # Tìm thấy chương: các level1 trước phần chứa nó đã xong
+            writer.enter_subsection(parent, section["id"], section["heading_id"], section["title"])
+            writer.finish_before(parent)
+        print(f"   ✅ Tìm thấy: {section['title']}")
+
+    # forward: chỉ chuyển tới section phía sau; once: mỗi section chỉ được chuyển tới một lần.
+    # Theo outline thì các section luôn nối tiếp nhau như forward
+    once = index is None and config["transition"] == "once"
+    visited = set()
+    current = config["initial_section"]
+    # Bắt đầu giữa sách theo outline: nội dung đầu tiên thuộc section cuối cùng bắt đầu
+    # trước first_page (section bắt đầu đúng first_page được chuyển tới ở vòng lặp)
+    resumed = index.section_at(config["first_page"] - 1) if index is not None else None
+    if resumed is not None:
+        current = resumed
+        switch_to(current)
+    elif current is None:
+        # Chưa tìm thấy section nào: nội dung nằm cuối container cuối cùng
+        current = -1
+        writer.enter(len(level1))
+    else:
+        writer.enter(parent_of[current])
+
+    last_page_seen = config["first_page"] - 1
+    print("📖 Đang xử lý từng trang...")
+    for i, _, text in iter_page_texts(
+        config["pdf"],
+        config["book_info"],
+        first=config["first_page"],
+        last=config["last_page"],
+        processes=processes,
+        cache=PageCache() if cache else None,
+    ):
+        if i % 50 == 0:
+            print(f"   📄 Đã xử lý {i} trang...")
+
+        if not text.strip():
+            # Trang trống ngắt câu dở dang: không nối qua nó sang trang có nội dung sau
+            flush_carry()
+            continue
+
+        if index is not None:
+            # Các section bắt đầu từ sau trang có nội dung trước đó tới trang này
+            started = index.starting_between(last_page_seen, i)
+            for idx in started:
+                current = idx
+                switch_to(idx)
+        else:
+            started = []
+            detected = detector.detect(text)
+            if detected is not None:
+                started = [detected]
+                # Tiêu đề có thể lặp lại (vd. "Chương 2"): lấy section hợp lệ đầu tiên cùng tiêu đề
+                for idx in same_title[sections[detected]["title"]]:
+                    if once:
+                        if idx in visited:
+                            continue
+                        visited.add(idx)
+                        switch_to(idx)
+                        break
+                    if idx >= current:
+                        if idx > current:
+                            current = idx
+                            switch_to(idx)
+                        break
+        last_page_seen = i
+
+        content_text = text
+        if config["strip_heading"]:
+            for idx in started:
+                content_text = content_text.replace(f"{sections[idx]['title']} ", "").strip()
+        if carry and content_text:
+            # Trang bắt đầu giữa câu của trang trước: pagenum nằm trong đoạn chứa câu đó
+            breaks = carry_breaks + [(len(carry) + 1, i)]
+            content_text = f"{carry} {content_text}"
+        else:
+            flush_carry()
+            writer.pagenum(i)
+            breaks = []
+
+        end = tail = len(content_text)
+        if config["join_pages"]:
+            end, tail = segmenter.split_unfinished(content_text)
+            if breaks and tail < breaks[-1][0]:
+                # Cả trang vẫn chưa hết câu: không giữ thêm để bộ nhớ chỉ cỡ một trang
+                end = tail = len(content_text)
+        k = 0
+        for start, stop in segmenter.paragraph_spans(content_text, n, end):
+            j = k
+            while j < len(breaks) and breaks[j][0] < stop:
+                j += 1
+            writer.paragraph(
+                content_text[start:stop], [(max(o - start, 0), p) for o, p in breaks[k:j]]
+            )
+            k = j
+        carry = content_text[tail:]
+        carry_breaks = [(max(o - tail, 0), p) for o, p in breaks[k:]]
+
+    flush_carry()
+    writer.close()
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chuyển PDF sang DTBook theo file cấu hình sách")
+    parser.add_argument("configs", nargs="+", help="file cấu hình JSON (vd. books/ho_quy_ly.json)")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="số tiến trình trích text")
+    parser.add_argument("--no-cache", action="store_true", help="không dùng cache text các trang")
+    args = parser.parse_args()
+
+    for path in args.configs:
+        config = load_book_config(path)
+        print(f"📚 {config['book_info']['title']}")
+        for output in convert_book(config, args.processes, cache=not args.no_cache):
+            print(f"📁 Đã xuất: {output}")
+            validate_dtbook(output)
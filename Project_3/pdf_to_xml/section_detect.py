@@ -0,0 +1,204 @@
+import argparse
+import re
+import time
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fuzzy_key(text: str) -> str:
+    """Dạng so khớp chịu lỗi: bỏ khoảng trắng, NFC, viết hoa ("SỈ NHỤ C" -> "SỈNHỤC")"""
+    return unicodedata.normalize("NFC", _WHITESPACE.sub("", text)).upper()
+
+
+def _trie_pattern(words) -> str:
+    """Regex dạng trie cho tập chuỗi: mỗi vị trí chỉ thử các nhánh theo ký tự đầu,
+    nhánh dài nhất được ưu tiên (quantifier `?` tham lam)"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _is_anchored(pattern: str) -> bool:
+    """Regex bắt đầu bằng ^ và không có | ở mức ngoài cùng (có thể ghép chung sau ^)"""
+    if not pattern.startswith("^"):
+        return False
+    depth, escaped, in_class = 0, False, False
+    for ch in pattern:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return False
+    return True
+
+
+class SectionDetector:
+    """Nhận diện section của một trang, trả về chỉ số section trực tiếp.
+
+    Luật của mọi section được biên dịch một lần:
+    - regex bắt đầu bằng ^ (vd. tiêu đề outline) ghép thành một alternation có
+      named group, so khớp một lần ở đầu trang; nhánh khớp đầu tiên chính là
+      luật đứng trước theo thứ tự cấu hình;
+    - các chuỗi `contains` ghép thành một regex dạng trie duyệt một lượt trên text
+      viết hoa (hoặc dạng fuzzy_key nếu fuzzy=True), luật chỉ được xét khi đủ
+      mọi chuỗi của nó.
+    Chi phí mỗi trang không phụ thuộc số section, chỉ phụ thuộc số chuỗi tìm thấy.
+    """
+
+    def __init__(self, sections, fuzzy=False):
+        self.fuzzy = fuzzy
+        self.rule_section = []  # thứ tự luật -> chỉ số section
+        anchored = []
+        self.rule_regex = []  # regex phải kiểm tra riêng (None nếu đã ghép hoặc không có)
+        self.rule_keywords = []
+        self.unconditional = []  # luật chỉ có regex không ghép được, xét theo thứ tự
+        keyword_rules = {}
+
+        for index, section in enumerate(sections):
+            for rule in section["match"]:
+                order = len(self.rule_section)
+                self.rule_section.append(index)
+                pattern = rule.get("regex")
+                keywords = list(dict.fromkeys(self._key(k) for k in rule.get("contains", ())))
+                if pattern is not None and not keywords and _is_anchored(pattern):
+                    anchored.append(f"(?P<r{order}>{pattern[1:]})")
+                    pattern = None
+                    keywords = None  # luật đã nằm trong alternation
+                self.rule_regex.append(
+                    re.compile(pattern, re.IGNORECASE) if pattern is not None else None
+                )
+                self.rule_keywords.append(keywords)
+                if keywords:
+                    for k in keywords:
+                        keyword_rules.setdefault(k, []).append(order)
+                elif keywords is not None:
+                    self.unconditional.append(order)
+
+        self.anchored = re.compile("|".join(anchored), re.IGNORECASE) if anchored else None
+        self.keyword_rules = keyword_rules
+        # Mỗi vị trí chỉ lấy chuỗi dài nhất bắt đầu tại đó; các chuỗi con của nó được suy
+        # ra qua `implied`, chuỗi bắt đầu ở vị trí sau được tìm tiếp từ start + 1
+        self.keywords = re.compile(_trie_pattern(keyword_rules)) if keyword_rules else None
+        self.implied = {k: [o for o in keyword_rules if o in k] for k in keyword_rules}
+
+    def _key(self, keyword):
+        return fuzzy_key(keyword) if self.fuzzy else keyword
+
+    def detect(self, text):
+        """Chỉ số section của luật khớp đầu tiên (theo thứ tự cấu hình), hoặc None"""
+        text = text.strip()
+        best = len(self.rule_section)
+        if self.anchored is not None:
+            m = self.anchored.match(text)
+            if m is not None:
+                best = int(m.lastgroup[1:])
+
+        candidates = [o for o in self.unconditional if o < best]
+        if self.keywords is not None:
+            haystack = fuzzy_key(text) if self.fuzzy else text.upper()
+            present = set()
+            m = self.keywords.search(haystack)
+            while m is not None:
+                k = m.group()
+                if k not in present:
+                    present.update(self.implied[k])
+                m = self.keywords.search(haystack, m.start() + 1)
+            hits = {}
+            for k in present:
+                for order in self.keyword_rules[k]:
+                    if order < best:
+                        hits[order] = hits.get(order, 0) + 1
+            candidates += [o for o, n in hits.items() if n == len(self.rule_keywords[o])]
+
+        for order in sorted(candidates):
+            regex = self.rule_regex[order]
+            if regex is None or regex.search(text):
+                best = order
+                break
+        return self.rule_section[best] if best < len(self.rule_section) else None
+
+
+def compile_section_rules(sections):
+    """[(chỉ số section, regex hoặc None, các chuỗi phải có trong text viết hoa)]"""
+    rules = []
+    for index, section in enumerate(sections):
+        for rule in section["match"]:
+            regex = re.compile(rule["regex"], re.IGNORECASE) if "regex" in rule else None
+            rules.append((index, regex, tuple(rule.get("contains", ()))))
+    return rules
+
+
+def detect_section_linear(rules, text):
+    """Bản duyệt tuần tự từng luật (không fuzzy), giữ lại để đối chiếu/benchmark"""
+    text = text.strip()
+    upper = None
+    for index, regex, contains in rules:
+        if regex is not None and not regex.search(text):
+            continue
+        if contains:
+            if upper is None:
+                upper = text.upper()
+            if not all(c in upper for c in contains):
+                continue
+        return index
+    return None
+
+
+if __name__ == "__main__":
+    from page_cache import PageCache
+    from page_extract import iter_page_texts
+    from pdf_to_dtbook import load_book_config
+
+    parser = argparse.ArgumentParser(description="Kiểm tra và đo tốc độ nhận diện section")
+    parser.add_argument("configs", nargs="+", help="file cấu hình sách (books/*.json)")
+    args = parser.parse_args()
+
+    for path in args.configs:
+        config = load_book_config(path)
+        sections = config["sections"]
+        texts = [
+            text
+            for _, _, text in iter_page_texts(config["pdf"], config["book_info"], cache=PageCache())
+            if text.strip()
+        ]
+        rules = compile_section_rules(sections)
+        detector = SectionDetector(sections)
+        mismatches = [t for t in texts if detector.detect(t) != detect_section_linear(rules, t)]
+        if mismatches:
+            raise SystemExit(f"{path}: kết quả khác bản tuần tự ở {len(mismatches)} trang")
+
+        timings = []
+        for detect in (lambda t: detect_section_linear(rules, t), detector.detect):
+            start = time.perf_counter()
+            for t in texts:
+                detect(t)
+            timings.append(time.perf_counter() - start)
+        fuzzy = SectionDetector(sections, fuzzy=True)
+        changed = sum(fuzzy.detect(t) != detector.detect(t) for t in texts)
+        print(
+            f"{config['book_info']['title']}: {len(sections)} section, {len(texts)} trang, "
+            f"{timings[0] * 1e3:.1f} ms -> {timings[1] * 1e3:.1f} ms "
+            f"(x{timings[0] / timings[1]:.1f}); fuzzy đổi kết quả ở {changed} trang"
+        )
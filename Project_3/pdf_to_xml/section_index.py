@@ -0,0 +1,83 @@
+from bisect import bisect_right
+
+from pypdf import PdfReader
+
+
+def outline_entries(pdf_path) -> list[tuple[str, int | None]]:
+    """(tiêu đề, trang đích tính từ 1 hoặc None) của các mục outline (bookmark), theo thứ tự"""
+    reader = PdfReader(pdf_path)
+    if not hasattr(reader, "outline") or not reader.outline:
+        print("No outline found.")
+        return []
+    entries = []
+
+    def walk(items):
+        for item in items:
+            if isinstance(item, list):
+                walk(item)
+            else:
+                title = getattr(item, "title", None) or item.get("/Title")
+                if title:
+                    page = reader.get_destination_page_number(item)
+                    entries.append((title.strip(), page + 1 if page is not None else None))
+
+    walk(reader.outline)
+    return entries
+
+
+def outline_start_pages(sections, entries) -> list[int] | None:
+    """Trang bắt đầu của từng section theo outline, hoặc None nếu có section không có trong outline.
+
+    Section thứ k mang một tiêu đề ứng với mục outline thứ k cùng tiêu đề đó
+    (tiêu đề như "Chương 2" có thể lặp lại).
+    """
+    pages_by_title = {}
+    for title, page in entries:
+        pages_by_title.setdefault(title, []).append(page)
+    seen = {}
+    pages = []
+    for section in sections:
+        title = section["title"].strip()
+        k = seen.get(title, 0)
+        seen[title] = k + 1
+        candidates = pages_by_title.get(title, [])
+        if k >= len(candidates) or candidates[k] is None:
+            return None
+        pages.append(candidates[k])
+    return pages
+
+
+class SectionIndex:
+    """Chỉ mục khoảng trang -> section dựng sẵn từ trang bắt đầu của các section.
+
+    Tra cứu bằng bisect (O(log n)), không cần đọc text trang; các section cùng
+    trang bắt đầu giữ nguyên thứ tự cấu hình.
+    """
+
+    def __init__(self, start_pages):
+        order = sorted(range(len(start_pages)), key=lambda idx: (start_pages[idx], idx))
+        self.pages = [start_pages[idx] for idx in order]
+        self.sections = order
+
+    def section_at(self, page):
+        """Section chứa trang `page` (section bắt đầu sau cùng ở trang <= page), hoặc None"""
+        k = bisect_right(self.pages, page)
+        return self.sections[k - 1] if k else None
+
+    def starting_between(self, after, upto):
+        """Các section bắt đầu ở trang trong (after, upto], theo thứ tự"""
+        return self.sections[bisect_right(self.pages, after) : bisect_right(self.pages, upto)]
+
+    def page_ranges(self, first_page, last_page):
+        """[(section hoặc None, trang đầu, trang cuối)] phủ kín first_page..last_page,
+        dùng để chia việc theo chương"""
+        ranges = []
+        start, current = first_page, self.section_at(first_page)
+        for page, idx in zip(self.pages, self.sections):
+            if page <= first_page or page > last_page:
+                continue
+            if page > start:
+                ranges.append((current, start, page - 1))
+            start, current = page, idx
+        ranges.append((current, start, last_page))
+        return ranges
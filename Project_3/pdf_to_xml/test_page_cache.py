@@ -0,0 +1,47 @@
+import pytest
+
+from page_cache import MAGIC, PageCache, file_sha256
+
+BOOK_INFO = {"title": "Sách thử", "author": "Tác giả"}
+PAGES = {1: ("trang một", "Trang một."), 2: ("trang hai", "Trang hai.")}
+
+
+@pytest.fixture
+def cached_pdf(tmp_path):
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF-1.4 test")
+    cache = PageCache(tmp_path / "cache")
+    cache.store(pdf, BOOK_INFO, PAGES, 2)
+    return cache, pdf, cache._path(file_sha256(pdf))
+
+
+def test_round_trip(cached_pdf):
+    cache, pdf, _ = cached_pdf
+    assert cache.load(pdf, BOOK_INFO) == (2, PAGES)
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda data: MAGIC + b"\x01\x00",  # header bị cắt giữa trường độ dài
+        lambda data: data[: len(MAGIC) + 10],  # header JSON bị cắt
+        lambda data: data[:-5],  # khối zlib cuối bị cắt
+        lambda data: data[:-5] + b"xxxxx",  # khối zlib hỏng
+    ],
+)
+def test_corrupt_file_is_a_miss_and_removed(cached_pdf, corrupt):
+    cache, pdf, path = cached_pdf
+    path.write_bytes(corrupt(path.read_bytes()))
+
+    assert cache.load(pdf, BOOK_INFO) == (None, {})
+    assert not path.exists()
+
+    cache.store(pdf, BOOK_INFO, PAGES, 2)
+    assert cache.load(pdf, BOOK_INFO) == (2, PAGES)
+
+
+def test_prune_removes_truncated_file(cached_pdf):
+    cache, _, path = cached_pdf
+    path.write_bytes(MAGIC + b"\x01")
+    cache.prune()
+    assert not path.exists()
@@ -0,0 +1,71 @@
+import json
+
+from lxml import etree
+
+import pdf_to_dtbook
+from pdf_to_dtbook import convert_book, load_book_config
+
+NS = {"dtb": "http://www.daisy.org/z3986/2005/dtbook/"}
+BOOK_INFO = {
+    "title": "Sách thử",
+    "author": "Tác giả",
+    "publisher": "",
+    "date": "2025",
+    "description": "",
+    "subject": "",
+    "language": "vi",
+}
+
+
+def convert_pages(tmp_path, monkeypatch, pages, **options):
+    config_path = tmp_path / "book.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "pdf": "book.pdf",
+                "output": str(tmp_path / "book.xml"),
+                "book_info": BOOK_INFO,
+                "locate": "text",
+                "sections": [{"title": "Chương 1", "match": [{"regex": "^Chương 1"}]}],
+                **options,
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    def fake_pages(pdf, book_info, first=1, last=None, processes=None, cache=None):
+        for i, text in enumerate(pages[first - 1 : last], start=first):
+            yield i, text, text
+
+    monkeypatch.setattr(pdf_to_dtbook, "iter_page_texts", fake_pages)
+    config = load_book_config(config_path)
+    (output,) = convert_book(config, cache=False)
+    return etree.parse(output).getroot()
+
+
+def test_sentence_is_joined_across_page_break(tmp_path, monkeypatch):
+    root = convert_pages(tmp_path, monkeypatch, ["Câu một. Câu hai bị", "ngắt trang. Câu ba."])
+    paragraphs = root.findall(".//dtb:p", NS)
+    assert "".join(paragraphs[1].itertext()) == "Câu hai bị 2ngắt trang. Câu ba."
+    assert paragraphs[1].find("dtb:pagenum", NS).text == "2"
+
+
+def test_blank_page_flushes_unfinished_sentence(tmp_path, monkeypatch):
+    root = convert_pages(tmp_path, monkeypatch, ["Câu một. Câu hai bị", "  ", "ngắt trang. Câu ba."])
+    texts = ["".join(p.itertext()) for p in root.findall(".//dtb:p", NS)]
+    assert texts == ["Câu một.", "Câu hai bị", "ngắt trang. Câu ba."]
+    assert root.find(".//dtb:p/dtb:pagenum", NS) is None
+    assert [p.text for p in root.findall(".//dtb:pagenum", NS)] == ["1", "3"]
+
+
+def test_outline_start_after_first_page_section(tmp_path, monkeypatch):
+    sections = [{"title": "Chương 1"}, {"title": "Chương 2"}, {"title": "Chương 3"}]
+    entries = [("Chương 1", 1), ("Chương 2", 2), ("Chương 3", 4)]
+    monkeypatch.setattr(pdf_to_dtbook, "outline_entries", lambda pdf: entries)
+    pages = ["Chương 1 Một.", "Chương 2 Hai.", "Vẫn chương hai.", "Chương 3 Ba."]
+    root = convert_pages(tmp_path, monkeypatch, pages, locate="outline", sections=sections, first_page=3)
+
+    level1 = root.findall(".//dtb:level1", NS)
+    texts = [[p.text for p in level.findall("dtb:p", NS)] for level in level1]
+    assert texts == [[], ["Vẫn chương hai."], ["Chương 3 Ba."]]
+    assert level1[1].find("dtb:pagenum", NS).text == "3"
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+from lxml import etree
+
+import merge_daisy
+from merge_daisy import discover_parts, merge_parts
+
+OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://openebook.org/namespaces/oeb-package/1.0/" unique-identifier="uid">
+  <metadata/>
+  <manifest>
+    <item id="ncx" href="navigation.ncx" media-type="application/x-dtbncx+xml"/>
+    <item id="mo1" href="mo1.smil" media-type="application/smil"/>
+    <item id="a1" href="audio/a1.mp3" media-type="audio/mpeg"/>
+  </manifest>
+  <spine><itemref idref="mo1"/></spine>
+</package>
+"""
+NCX = """<?xml version="1.0" encoding="utf-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+  <navMap>
+    <navPoint id="np1" playOrder="1"><navLabel><text>1</text></navLabel><content src="mo1.smil#p1"/></navPoint>
+  </navMap>
+</ncx>
+"""
+SMIL = """<?xml version="1.0" encoding="utf-8"?>
+<smil xmlns="http://www.w3.org/2001/SMIL20/">
+  <head><meta name="dtb:totalElapsedTime" content="0:00:00.000"/></head>
+  <body><seq dur="2.5s"><par id="p1"><audio src="audio/a1.mp3" clipBegin="0:00:00" clipEnd="0:00:02.500"/></par></seq></body>
+</smil>
+"""
+
+
+NESTED_NCX = NCX.replace(
+    "</navPoint>",
+    '<navPoint id="np2" playOrder="2"><navLabel><text>1.1</text></navLabel>'
+    '<content src="mo1.smil#p1"/></navPoint></navPoint>',
+)
+
+
+def make_part(root, name, ncx=NCX):
+    part = root / name
+    (part / "audio").mkdir(parents=True)
+    (part / "book.opf").write_text(OPF, encoding="utf-8")
+    (part / "navigation.ncx").write_text(ncx, encoding="utf-8")
+    (part / "mo1.smil").write_text(SMIL, encoding="utf-8")
+    (part / "audio" / "a1.mp3").write_bytes(b"\0" * 64)
+
+
+def test_relative_unnormalised_output_root(tmp_path, monkeypatch):
+    make_part(tmp_path / "in", "part_1")
+    make_part(tmp_path / "in", "part_2")
+    monkeypatch.chdir(tmp_path)
+    parts = discover_parts("in")
+
+    for _ in range(2):  # lần hai: thư mục đích đã có, đi qua bước dọn file thừa
+        merge_parts(parts, "./out_rel/../out_rel", mode="copy", full=True)
+        for idx in (1, 2):
+            part_root = os.path.join("out_rel", "parts", f"part_{idx:02d}")
+            assert os.path.isfile(os.path.join(part_root, "audio", "a1.mp3"))
+            assert os.path.isfile(os.path.join(part_root, "mo1.smil"))
+    assert os.path.isfile(os.path.join("out_rel", "book.opf"))
+
+
+def elapsed_of(smil_path):
+    root = etree.parse(str(smil_path)).getroot()
+    return root.find(".//{*}meta[@name='dtb:totalElapsedTime']").get("content")
+
+
+def test_crash_after_smil_rewrite_does_not_leave_stale_offsets(tmp_path, monkeypatch):
+    make_part(tmp_path / "in", "part_1")
+    make_part(tmp_path / "in", "part_2")
+    parts = discover_parts(str(tmp_path / "in"))
+    out = str(tmp_path / "out")
+    first_smil = tmp_path / "in" / "part_1" / "mo1.smil"
+    second_out = tmp_path / "out" / "parts" / "part_02" / "mo1.smil"
+    merge_parts(parts, out, mode="copy")
+    assert elapsed_of(second_out) == "0:00:02.500"
+
+    # Phần 1 dài ra, lần merge dừng sau khi đã ghi lại SMIL nhưng trước khi lưu manifest
+    first_smil.write_text(SMIL.replace('dur="2.5s"', 'dur="5s"'), encoding="utf-8")
+    os.utime(first_smil, ns=(1, 1))
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("dừng giữa chừng")
+
+    with monkeypatch.context() as m:
+        m.setattr(merge_daisy, "build_merged_ncx", crash)
+        with pytest.raises(RuntimeError):
+            merge_parts(parts, out, mode="copy")
+    assert elapsed_of(second_out) == "0:00:05.000"
+
+    # Phần 1 trở lại như cũ: offset của phần 2 lại là 2.5s, file SMIL phải được ghi lại
+    first_smil.write_text(SMIL, encoding="utf-8")
+    os.utime(first_smil, ns=(2, 2))
+    merge_parts(parts, out, mode="copy")
+    assert elapsed_of(second_out) == "0:00:02.500"
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_ncx_depth_counts_nested_nav_points(tmp_path, stream):
+    make_part(tmp_path / "in", "part_1")
+    make_part(tmp_path / "in", "part_2", NESTED_NCX)
+    out = tmp_path / "out"
+    merge_parts(discover_parts(str(tmp_path / "in")), str(out), mode="copy", stream=stream)
+
+    root = etree.parse(str(out / "navigation.ncx")).getroot()
+    assert root.find(".//{*}meta[@name='dtb:depth']").get("content") == "3"
+    assert len(root.findall(".//{*}navPoint/{*}navPoint/{*}navPoint")) == 1